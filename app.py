@@ -1,26 +1,157 @@
+import base64
+import bisect
 import copy
+import csv
+import gzip
+import hashlib
+import heapq
+import io
+import json
+import math
+import os
+import random
 import re
 import secrets
 import string
 import threading
 import time
 import uuid
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, wait
 from functools import wraps
 from urllib.parse import urlparse
 
 import requests
 
-from flask import Flask, jsonify, redirect, render_template, request, session, url_for
+from flask import (
+    Flask,
+    Response,
+    g,
+    has_request_context,
+    jsonify,
+    redirect,
+    render_template,
+    request,
+    session,
+    url_for,
+)
 from proxmoxer import ProxmoxAPI
+from proxmoxer.core import AuthenticationError
 
 import config
+import metrics
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 app = Flask(__name__)
 app.secret_key = config.APP_SECRET_KEY
 
+CLUSTERS = {cluster["name"]: cluster for cluster in config.PVE_CLUSTERS}
+DEFAULT_CLUSTER = config.PVE_CLUSTERS[0]["name"]
+CLUSTER_STATE = {
+    name: {
+        "client": None,
+        "ok": None,
+        "error": "",
+        "latency_ms": None,
+        "checked": None,
+        "retry_at": 0.0,
+        "pending": {},
+    }
+    for name in CLUSTERS
+}
+CLUSTER_LOCK = threading.Lock()
+FANOUT_POOL = ThreadPoolExecutor(max_workers=max(4, 2 * len(CLUSTERS)), thread_name_prefix="fanout")
+
 JOBS = {}
 JOBS_LOCK = threading.Lock()
 
+HEALTH = {
+    "started": time.monotonic(),
+    "checked": None,
+    "checked_at": None,
+    "clusters": {},
+    "nft": None,
+    "jobs": None,
+    "prober": None,
+}
+HEALTH_LOCK = threading.Lock()
+JOB_ARGS = {}
+CREATE_INDEX = {}
+
+STEP_METERS = {}
+STEP_LOCAL = threading.local()
+STEP_FINAL_STATUSES = {"done", "warn", "error", "skipped"}
+
+STATS_SAMPLES = deque(maxlen=config.STATS_MAX_SAMPLES)
+STATS_LOCK = threading.Lock()
+
+SLOW_LOG_LOCK = threading.Lock()
+
+INVENTORY = {
+    "epoch": uuid.uuid4().hex[:8],
+    "version": 0,
+    "items": {},
+    "changes": deque(maxlen=config.INVENTORY_CHANGE_LOG),
+    "refreshed": None,
+    "loaded": set(),
+    "watched": 0.0,
+    "refresher": None,
+}
+INVENTORY_LOCK = threading.Condition()
+
+CAPACITY = {"snapshots": {}, "reservations": {}}
+CAPACITY_LOCK = threading.Lock()
+
+# Proxmox RRD resolution per timeframe; cached history lives that long.
+RRD_TIMEFRAMES = {"hour": 60, "day": 1800, "week": 10800}
+RRD_FIELDS = ("cpu", "mem", "maxmem", "diskread", "diskwrite", "netin", "netout")
+RRD_CACHE = {}
+RRD_INFLIGHT = {}
+RRD_LOCK = threading.Lock()
+
+VM_INDEX = {
+    "vmids": [],
+    "names": [],
+    "by_status": {},
+    "by_node": {},
+    "by_cluster": {},
+    "by_ip": {},
+}
+VM_SORTS = {"vmid", "-vmid", "name", "-name"}
+VM_FILTERS = ("q", "status", "ip", "node", "cluster", "sort", "limit", "cursor")
+
+EXPORT_FIELDS = (
+    "cluster",
+    "vmid",
+    "name",
+    "node",
+    "status",
+    "ip",
+    "cores",
+    "memory_mb",
+    "disk_size_mb",
+    "ssh_port",
+    "port_range",
+    "error",
+)
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/javascript",
+    "text/javascript",
+    "text/css",
+    "text/html",
+    "text/plain",
+}
+COMPRESSED_STATIC = {}
+ASSET_VERSIONS = {}
+INVENTORY_NUDGE = threading.Event()
+
 STEP_ORDER = [
     {"key": "clone", "label": "Clone template"},
     {"key": "cloudinit", "label": "Apply cloud-init"},
@@ -30,6 +161,28 @@ STEP_ORDER = [
     {"key": "ports", "label": "Allocate ports"},
 ]
 
+DESTROY_STEP_ORDER = [
+    {"key": "lookup", "label": "Resolve VMs"},
+    {"key": "destroy", "label": "Stop & destroy VMs"},
+    {"key": "ports", "label": "Release ports"},
+    {"key": "restart", "label": "Restart nftables"},
+]
+
+DESTROY_MAX_WORKERS = 4
+DESTROY_MAX_BATCH = 50
+
+ENDPOINT_PLACEHOLDERS = {
+    "nodes": "{node}",
+    "tasks": "{upid}",
+    "storage": "{storage}",
+    "agent": "{command}",
+}
+
+# Proxmox task logs report e.g. "transferred 1.2 GiB of 8.5 GiB (14.12%)"
+# for clones and "(12.00/100%)" for qemu-img copies.
+TASK_PROGRESS_PATTERN = re.compile(r"(\d+(?:\.\d+)?)(?:/100)?\s*%")
+PROGRESS_SUFFIX = re.compile(r" \(\d+%\)$")
+
 NAME_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]{2,30}$")
 
 
@@ -42,9 +195,11 @@ def _generate_password(length=16):
     return "".join(secrets.choice(alphabet) for _ in range(length))
 
 
-def _new_job():
+def _new_job(steps=None, kind="provision", preset=None):
     return {
         "id": uuid.uuid4().hex,
+        "kind": kind,
+        "preset": preset,
         "status": "queued",
         "steps": [
             {
@@ -52,37 +207,309 @@ def _new_job():
                 "label": step["label"],
                 "status": "pending",
                 "message": "",
+                "started": None,
+                "finished": None,
+                "duration_ms": None,
+                "upstream_calls": 0,
+                "upstream_bytes": 0,
+                "upstream_ms": 0,
+                "wait_ms": 0,
+                "progress": None,
             }
-            for step in STEP_ORDER
+            for step in (steps or STEP_ORDER)
         ],
         "result": {},
         "error": "",
+        "started": time.monotonic(),
+        "finished": None,
         "created_at": _now(),
         "updated_at": _now(),
     }
 
 
+class _StepMeter:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.bytes = 0
+        self.upstream = 0.0
+        self.wait = 0.0
+
+    def add_call(self, elapsed, size):
+        with self.lock:
+            self.calls += 1
+            self.bytes += size
+            self.upstream += elapsed
+
+    def add_wait(self, seconds):
+        with self.lock:
+            self.wait += seconds
+
+
+def _current_meter():
+    return getattr(STEP_LOCAL, "meter", None)
+
+
+def _in_step(job_id, key, fn, *args):
+    with JOBS_LOCK:
+        meter = STEP_METERS.get((job_id, key))
+    previous = _current_meter()
+    STEP_LOCAL.meter = meter
+    try:
+        return fn(*args)
+    finally:
+        STEP_LOCAL.meter = previous
+
+
+def _endpoint_template(url):
+    path = urlparse(url).path
+    if "/api2/" in path:
+        path = path.split("/api2/", 1)[1]
+        path = path.split("/", 1)[1] if "/" in path else ""
+    parts = [part for part in path.split("/") if part]
+    template = []
+    for index, part in enumerate(parts):
+        previous = parts[index - 1] if index else None
+        if previous in ENDPOINT_PLACEHOLDERS:
+            template.append(ENDPOINT_PLACEHOLDERS[previous])
+        elif part.isdigit():
+            template.append("{vmid}")
+        else:
+            template.append(part)
+    return "/" + "/".join(template)
+
+
+def _request_profile():
+    if not has_request_context():
+        # Fan-out threads record into the profile of the request that
+        # started them.
+        return getattr(STEP_LOCAL, "profile", None)
+    return g.get("profile")
+
+
+def _profile_cache(name, hit, elapsed=0.0):
+    profile = _request_profile()
+    if profile is None:
+        return
+    profile.append(
+        {
+            "service": "cache",
+            "method": "GET",
+            "endpoint": name,
+            "status": None,
+            "duration_ms": round(elapsed * 1000, 2),
+            "cache": "hit" if hit else "miss",
+        }
+    )
+
+
+def _record_upstream(service, method, url, status_code, elapsed, size):
+    meter = _current_meter()
+    if meter is not None:
+        meter.add_call(elapsed, size)
+    labels = {
+        "service": service,
+        "endpoint": _endpoint_template(url),
+        "method": method.upper(),
+        "status": status_code or "error",
+    }
+    profile = _request_profile()
+    if profile is not None:
+        profile.append(
+            {
+                "service": service,
+                "method": labels["method"],
+                "endpoint": labels["endpoint"],
+                "status": status_code,
+                "duration_ms": round(elapsed * 1000, 2),
+                "cache": "miss",
+            }
+        )
+    metrics.observe("pve_panel_upstream_request_duration_seconds", elapsed, **labels)
+    if status_code is None or status_code >= 400:
+        metrics.inc("pve_panel_upstream_errors_total", **labels)
+
+
+def _instrument_session(http_session, service="proxmox"):
+    send = http_session.request
+
+    def request_with_metrics(method, url, *args, **kwargs):
+        started = time.monotonic()
+        try:
+            response = send(method, url, *args, **kwargs)
+        except requests.RequestException:
+            _record_upstream(service, method, url, None, time.monotonic() - started, 0)
+            raise
+        _record_upstream(
+            service,
+            method,
+            url,
+            response.status_code,
+            time.monotonic() - started,
+            len(response.content or b""),
+        )
+        return response
+
+    http_session.request = request_with_metrics
+    return http_session
+
+
+def _poll_sleep(loop, seconds=None):
+    seconds = config.POLL_INTERVAL if seconds is None else seconds
+    metrics.inc("pve_panel_wait_polls_total", loop=loop)
+    time.sleep(seconds)
+    meter = _current_meter()
+    if meter is not None:
+        meter.add_wait(seconds)
+
+
+def _start_step_meter(job_id, step):
+    meter = _StepMeter()
+    STEP_METERS[(job_id, step["key"])] = meter
+    STEP_LOCAL.meter = meter
+    STEP_LOCAL.step = (job_id, step["key"])
+    step["started"] = time.monotonic()
+
+
+def _finish_step_meter(job, step):
+    meter = STEP_METERS.pop((job["id"], step["key"]), None)
+    step["finished"] = time.monotonic()
+    step["duration_ms"] = int((step["finished"] - step["started"]) * 1000)
+    if meter is not None:
+        with meter.lock:
+            step["upstream_calls"] = meter.calls
+            step["upstream_bytes"] = meter.bytes
+            step["upstream_ms"] = int(meter.upstream * 1000)
+            step["wait_ms"] = int(meter.wait * 1000)
+        if _current_meter() is meter:
+            STEP_LOCAL.meter = None
+    if getattr(STEP_LOCAL, "step", None) == (job["id"], step["key"]):
+        STEP_LOCAL.step = None
+    return {
+        "at": time.time(),
+        "kind": job["kind"],
+        "preset": job["preset"],
+        "step": step["key"],
+        "duration_ms": step["duration_ms"],
+        "upstream_calls": step["upstream_calls"],
+        "upstream_bytes": step["upstream_bytes"],
+        "upstream_ms": step["upstream_ms"],
+        "wait_ms": step["wait_ms"],
+    }
+
+
+def _finish_job_timing(job):
+    job["finished"] = time.monotonic()
+    steps = [step for step in job["steps"] if step["duration_ms"] is not None]
+    return {
+        "at": time.time(),
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "preset": job["preset"],
+        "step": "total",
+        "duration_ms": int((job["finished"] - job["started"]) * 1000),
+        "upstream_calls": sum(step["upstream_calls"] for step in steps),
+        "upstream_bytes": sum(step["upstream_bytes"] for step in steps),
+        "upstream_ms": sum(step["upstream_ms"] for step in steps),
+        "wait_ms": sum(step["wait_ms"] for step in steps),
+    }
+
+
+def _record_sample(sample):
+    with STATS_LOCK:
+        STATS_SAMPLES.append(sample)
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def _summarize_samples(samples):
+    durations = [sample["duration_ms"] for sample in samples]
+    count = len(samples)
+    return {
+        "count": count,
+        "p50_ms": _percentile(durations, 50),
+        "p95_ms": _percentile(durations, 95),
+        "p99_ms": _percentile(durations, 99),
+        "max_ms": max(durations) if durations else None,
+        "avg_upstream_calls": round(sum(s["upstream_calls"] for s in samples) / count, 1),
+        "avg_upstream_bytes": int(sum(s["upstream_bytes"] for s in samples) / count),
+        "avg_upstream_ms": int(sum(s["upstream_ms"] for s in samples) / count),
+        "avg_wait_ms": int(sum(s["wait_ms"] for s in samples) / count),
+    }
+
+
+def _aggregate_samples(samples):
+    by_step = {}
+    for sample in samples:
+        by_step.setdefault(sample["step"], []).append(sample)
+    total = by_step.pop("total", [])
+    steps = {key: _summarize_samples(items) for key, items in by_step.items()}
+    bottleneck = max(steps, key=lambda key: steps[key]["p50_ms"] or 0) if steps else None
+    return {
+        "jobs": len(total),
+        "total": _summarize_samples(total) if total else None,
+        "steps": steps,
+        "bottleneck": bottleneck,
+    }
+
+
 def _update_job(job_id, **fields):
+    sample = None
     with JOBS_LOCK:
         job = JOBS.get(job_id)
         if not job:
             return
         job.update(fields)
+        if fields.get("status") in {"done", "error"} and job["finished"] is None:
+            sample = _finish_job_timing(job)
         job["updated_at"] = _now()
+    if sample is not None:
+        _record_sample(sample)
+        _nudge_inventory()
 
 
 def _update_step(job_id, key, status, message=None):
+    sample = None
     with JOBS_LOCK:
         job = JOBS.get(job_id)
         if not job:
             return
         for step in job["steps"]:
             if step["key"] == key:
+                if status == "running" and step["status"] != "running":
+                    _start_step_meter(job_id, step)
+                elif status in STEP_FINAL_STATUSES and step["status"] == "running":
+                    sample = _finish_step_meter(job, step)
+                    # A failed step keeps the last percentage its task reported.
+                    if status in {"done", "warn"} and step["progress"] is not None:
+                        step["progress"] = 100
                 step["status"] = status
                 if message is not None:
                     step["message"] = message
                 job["updated_at"] = _now()
-                return
+                break
+    if sample is not None:
+        _record_sample(sample)
+        _nudge_inventory()
+
+
+def _update_step_progress(job_id, key, progress):
+    with JOBS_LOCK:
+        job = JOBS.get(job_id)
+        if not job:
+            return
+        for step in job["steps"]:
+            if step["key"] == key and step["status"] == "running":
+                step["progress"] = round(progress, 1)
+                step["message"] = f"{PROGRESS_SUFFIX.sub('', step['message'])} ({progress:.0f}%)"
+                job["updated_at"] = _now()
+                break
 
 
 def _set_result(job_id, **fields):
@@ -107,7 +534,118 @@ def _cleanup_jobs(max_age=6 * 3600):
     with JOBS_LOCK:
         for job_id in list(JOBS.keys()):
             if JOBS[job_id].get("updated_at", 0) < cutoff:
-                JOBS.pop(job_id, None)
+                job = JOBS.pop(job_id, None)
+                JOB_ARGS.pop(job_id, None)
+                for step in job["steps"]:
+                    STEP_METERS.pop((job_id, step["key"]), None)
+
+
+def _claim_create(keys, fingerprint, job, args):
+    # Atomically returns the live index entry for any of keys, or stores
+    # job and indexes it under all of them.
+    now = time.monotonic()
+    with JOBS_LOCK:
+        for key in [key for key, entry in CREATE_INDEX.items() if entry["expires"] < now]:
+            CREATE_INDEX.pop(key)
+        for key in keys:
+            entry = CREATE_INDEX.get(key)
+            if entry and entry["job_id"] in JOBS:
+                return key, entry
+        JOBS[job["id"]] = job
+        JOB_ARGS[job["id"]] = args
+        for key in keys:
+            CREATE_INDEX[key] = {
+                "job_id": job["id"],
+                "fingerprint": fingerprint,
+                "expires": now + config.IDEMPOTENCY_TTL_SECONDS,
+            }
+    return None, None
+
+
+def _unclaim_create(job_id):
+    with JOBS_LOCK:
+        JOBS.pop(job_id, None)
+        JOB_ARGS.pop(job_id, None)
+        for key in [key for key, entry in CREATE_INDEX.items() if entry["job_id"] == job_id]:
+            CREATE_INDEX.pop(key)
+
+
+def _forget_created_names(cluster, vmids):
+    # Frees the names of destroyed VMs so they can be requested again.
+    cluster = cluster or DEFAULT_CLUSTER
+    with JOBS_LOCK:
+        for key, entry in list(CREATE_INDEX.items()):
+            result = (JOBS.get(entry["job_id"]) or {}).get("result") or {}
+            if key[0] == "name" and result.get("cluster") == cluster and result.get("vmid") in vmids:
+                CREATE_INDEX.pop(key)
+
+
+def _forget_vanished_name(name):
+    # A finished job keeps its name claimed so a late retry can't clone a
+    # second VM. If that VM has since been deleted outside the panel, an
+    # inventory refreshed after the job finished no longer has it, and the
+    # name is released.
+    with JOBS_LOCK:
+        entry = CREATE_INDEX.get(("name", name))
+        job = JOBS.get(entry["job_id"]) if entry else None
+        if job is None or job["status"] != "done":
+            return
+        finished = job["finished"]
+        result = dict(job["result"])
+    key = (result.get("cluster"), result.get("vmid"))
+    with INVENTORY_LOCK:
+        refreshed = INVENTORY["refreshed"]
+        if refreshed is None or finished is None or refreshed < finished or key[0] not in INVENTORY["loaded"]:
+            return
+        item = INVENTORY["items"].get(key)
+        if item is not None and item.get("name") == result.get("name"):
+            return
+    with CLUSTER_LOCK:
+        if not CLUSTER_STATE[key[0]]["ok"]:
+            return
+    with JOBS_LOCK:
+        if CREATE_INDEX.get(("name", name)) is entry:
+            CREATE_INDEX.pop(("name", name))
+
+
+def _drop_total_sample(job_id):
+    with STATS_LOCK:
+        for sample in list(STATS_SAMPLES):
+            if sample["step"] == "total" and sample.get("job_id") == job_id:
+                STATS_SAMPLES.remove(sample)
+
+
+def _reopen_failed_job(job_id):
+    with JOBS_LOCK:
+        job = JOBS.get(job_id)
+        if not job or job["status"] != "error" or job_id not in JOB_ARGS:
+            return None
+        # The resumed run's total replaces the failed attempt's sample and
+        # includes its running time, but not the idle gap before the retry.
+        elapsed = job["finished"] - job["started"] if job["finished"] is not None else 0.0
+        job.update(
+            status="queued",
+            error="",
+            started=time.monotonic() - elapsed,
+            finished=None,
+            updated_at=_now(),
+        )
+        for step in job["steps"]:
+            if step["status"] == "error":
+                step.update(status="pending", message="")
+        args = JOB_ARGS[job_id]
+    _drop_total_sample(job_id)
+    return args
+
+
+def _start_provision(job_id, args):
+    thread = threading.Thread(
+        target=_provision_vm,
+        args=(job_id, *args),
+        name=f"provision-{job_id}",
+        daemon=True,
+    )
+    thread.start()
 
 
 def _auth_enabled():
@@ -139,6 +677,7 @@ def _nft_request(method, path, payload=None):
         return None, {"error": "NFT port panel token is not configured"}, 400
     url = f"{base_url}{path}"
     headers = _nft_headers()
+    started = time.monotonic()
     try:
         response = requests.request(
             method,
@@ -148,7 +687,16 @@ def _nft_request(method, path, payload=None):
             timeout=10,
         )
     except requests.RequestException as exc:
+        _record_upstream("nft", method, path, None, time.monotonic() - started, 0)
         return None, {"error": f"NFT port panel request failed: {exc}"}, 502
+    _record_upstream(
+        "nft",
+        method,
+        path,
+        response.status_code,
+        time.monotonic() - started,
+        len(response.content or b""),
+    )
     try:
         data = response.json()
     except ValueError:
@@ -169,43 +717,155 @@ def require_auth(fn):
     return wrapper
 
 
-def _get_proxmox():
-    host, port, path_prefix = _normalize_host()
-    if config.PVE_TOKEN_NAME and config.PVE_TOKEN_VALUE:
+def _cluster(name=None):
+    cluster = CLUSTERS.get(name or DEFAULT_CLUSTER)
+    if cluster is None:
+        raise KeyError(f"Unknown cluster: {name}")
+    return cluster
+
+
+def _request_cluster():
+    name = request.args.get("cluster")
+    if not name and request.is_json:
+        name = (request.get_json(silent=True) or {}).get("cluster")
+    name = name or DEFAULT_CLUSTER
+    return name if name in CLUSTERS else None
+
+
+def _get_proxmox(cluster=None):
+    # One client per cluster, reused across requests and jobs so its
+    # connection pool (and ticket, with password auth) stays warm.
+    settings = _cluster(cluster)
+    state = CLUSTER_STATE[settings["name"]]
+    with CLUSTER_LOCK:
+        proxmox = state["client"]
+    if proxmox is not None:
+        return proxmox
+    proxmox = _connect_proxmox(settings)
+    if _parse_host(settings)[0] == "http":
+        proxmox._store["base_url"] = _api_base("json", settings["name"])
+    http_session = proxmox._store["session"]
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=config.PVE_POOL_SIZE)
+    http_session.mount("https://", adapter)
+    http_session.mount("http://", adapter)
+    _instrument_session(http_session)
+    with CLUSTER_LOCK:
+        if state["client"] is None:
+            state["client"] = proxmox
+        return state["client"]
+
+
+def _connect_proxmox(settings):
+    host, port, path_prefix = _normalize_host(settings)
+    if settings["token_name"] and settings["token_value"]:
         return ProxmoxAPI(
             host,
-            user=config.PVE_USER,
-            token_name=config.PVE_TOKEN_NAME,
-            token_value=config.PVE_TOKEN_VALUE,
-            verify_ssl=config.PVE_VERIFY_SSL,
+            user=settings["user"],
+            token_name=settings["token_name"],
+            token_value=settings["token_value"],
+            verify_ssl=settings["verify_ssl"],
             port=port,
             path_prefix=path_prefix,
         )
-    if not config.PVE_PASSWORD:
+    if not settings["password"]:
         raise RuntimeError("PVE_PASSWORD is required when token auth is not set")
     return ProxmoxAPI(
         host,
-        user=config.PVE_USER,
-        password=config.PVE_PASSWORD,
-        verify_ssl=config.PVE_VERIFY_SSL,
+        user=settings["user"],
+        password=settings["password"],
+        verify_ssl=settings["verify_ssl"],
         port=port,
         path_prefix=path_prefix,
     )
 
 
+def _mark_cluster(name, error=None, elapsed=None):
+    with CLUSTER_LOCK:
+        state = CLUSTER_STATE[name]
+        state["checked"] = time.time()
+        state["ok"] = error is None
+        state["error"] = error or ""
+        if elapsed is not None:
+            state["latency_ms"] = round(elapsed * 1000, 1)
+        state["retry_at"] = 0.0 if error is None else time.monotonic() + config.PVE_CLUSTER_RETRY_SECONDS
+
+
+def _timed_call(fn, name, profile=None):
+    STEP_LOCAL.profile = profile
+    started = time.monotonic()
+    try:
+        return fn(name), time.monotonic() - started
+    finally:
+        STEP_LOCAL.profile = None
+
+
+def _cluster_available(name):
+    with CLUSTER_LOCK:
+        return CLUSTER_STATE[name]["retry_at"] <= time.monotonic()
+
+
+def _cluster_future(fn, name):
+    # A call still running from an earlier fan-out is joined rather than
+    # repeated, so a hung cluster can't fill the pool and starve the others.
+    # Its upstream calls show up in the profile of the request that started
+    # it only.
+    profile = _request_profile()
+    with CLUSTER_LOCK:
+        pending = CLUSTER_STATE[name]["pending"]
+        future = pending.get(fn)
+        if future is None or future.done():
+            try:
+                future = FANOUT_POOL.submit(_timed_call, fn, name, profile)
+            except RuntimeError as exc:
+                # The pool is shut down at interpreter exit.
+                future = Future()
+                future.set_exception(exc)
+            pending[fn] = future
+    return future
+
+
+def _fan_out(fn, clusters=None):
+    # Runs fn(cluster_name) on every cluster concurrently. A cluster that
+    # errors or doesn't answer within PVE_CLUSTER_TIMEOUT is left out of the
+    # result and skipped for PVE_CLUSTER_RETRY_SECONDS, so one unreachable
+    # cluster can't stall callers. With a single cluster there is nobody to
+    # stall and nothing else to serve, so a slow scan is simply waited out;
+    # each API call is still bounded by the client's own timeout.
+    futures = {}
+    for name in clusters or CLUSTERS:
+        if _cluster_available(name):
+            futures[_cluster_future(fn, name)] = name
+    done, _ = wait(futures, timeout=config.PVE_CLUSTER_TIMEOUT if len(CLUSTERS) > 1 else None)
+    results = {}
+    for future, name in futures.items():
+        if future not in done:
+            _mark_cluster(name, f"No answer within {config.PVE_CLUSTER_TIMEOUT:g}s")
+        elif future.exception() is not None:
+            _mark_cluster(name, str(future.exception()) or type(future.exception()).__name__)
+        else:
+            results[name], elapsed = future.result()
+            _mark_cluster(name, None, elapsed)
+    return results
+
+
+def _cluster_status():
+    with CLUSTER_LOCK:
+        return {name: {"ok": state["ok"], "error": state["error"]} for name, state in CLUSTER_STATE.items()}
+
+
 def _unwrap_data(payload):
     if isinstance(payload, dict) and "data" in payload:
         return payload["data"]
     return payload
 
 
-def _normalize_host():
-    _, host, port, path_prefix = _parse_host()
+def _normalize_host(settings=None):
+    _, host, port, path_prefix = _parse_host(settings)
     return host, port, path_prefix
 
 
-def _parse_host():
-    raw = (config.PVE_HOST or "").strip()
+def _parse_host(settings=None):
+    raw = ((settings or _cluster())["host"] or "").strip()
     if not raw:
         raise RuntimeError("PVE_HOST is required")
     if "://" in raw:
@@ -221,16 +881,17 @@ def _parse_host():
     return "https", parsed.hostname, parsed.port, None
 
 
-def _api_base(mode="json"):
-    scheme, host, port, path_prefix = _parse_host()
+def _api_base(mode="json", cluster=None):
+    scheme, host, port, path_prefix = _parse_host(_cluster(cluster))
     if not port:
         port = 8006
     prefix = f"/{path_prefix}" if path_prefix else ""
     return f"{scheme}://{host}:{port}{prefix}/api2/{mode}"
 
 
-def _extjs_resize(node, vmid, disk, size_value):
-    base_extjs = _api_base("extjs")
+def _extjs_resize(node, vmid, disk, size_value, cluster=None):
+    settings = _cluster(cluster)
+    base_extjs = _api_base("extjs", settings["name"])
     url = f"{base_extjs}/nodes/{node}/qemu/{vmid}/resize"
     payload = {
         "disk": disk,
@@ -238,15 +899,16 @@ def _extjs_resize(node, vmid, disk, size_value):
     }
     headers = {}
     cookies = None
-    if config.PVE_TOKEN_NAME and config.PVE_TOKEN_VALUE:
-        token = f"{config.PVE_USER}!{config.PVE_TOKEN_NAME}={config.PVE_TOKEN_VALUE}"
+    http = _instrument_session(requests.Session())
+    if settings["token_name"] and settings["token_value"]:
+        token = f"{settings['user']}!{settings['token_name']}={settings['token_value']}"
         headers["Authorization"] = f"PVEAPIToken={token}"
     else:
-        ticket_url = f"{_api_base('json')}/access/ticket"
-        resp = requests.post(
+        ticket_url = f"{_api_base('json', settings['name'])}/access/ticket"
+        resp = http.post(
             ticket_url,
-            data={"username": config.PVE_USER, "password": config.PVE_PASSWORD},
-            verify=config.PVE_VERIFY_SSL,
+            data={"username": settings["user"], "password": settings["password"]},
+            verify=settings["verify_ssl"],
             timeout=15,
         )
         resp.raise_for_status()
@@ -257,12 +919,12 @@ def _extjs_resize(node, vmid, disk, size_value):
             raise RuntimeError("Failed to fetch Proxmox auth ticket")
         cookies = {"PVEAuthCookie": ticket}
         headers["CSRFPreventionToken"] = csrf
-    response = requests.post(
+    response = http.post(
         url,
         data=payload,
         headers=headers,
         cookies=cookies,
-        verify=config.PVE_VERIFY_SSL,
+        verify=settings["verify_ssl"],
         timeout=30,
     )
     response.raise_for_status()
@@ -305,7 +967,7 @@ def _wait_for_disk_size(proxmox, node, vmid, target_mb, timeout=120):
         size = _read_disk_size_mb(proxmox, node, vmid)
         if size and size >= target_mb:
             return size
-        time.sleep(config.POLL_INTERVAL)
+        _poll_sleep("disk_size")
     return None
 
 
@@ -362,7 +1024,7 @@ def _update_config(proxmox, node, vmid, **payload):
     proxmox.nodes(node).qemu(vmid).config.post(**payload)
 
 
-def _resize_disk_by_mb(proxmox, node, vmid, disk, delta_mb):
+def _resize_disk_by_mb(proxmox, node, vmid, disk, delta_mb, cluster=None):
     if delta_mb <= 0:
         return None
     size_delta = f"+{delta_mb}M"
@@ -387,15 +1049,38 @@ def _resize_disk_by_mb(proxmox, node, vmid, disk, delta_mb):
             if "501" not in message and "Not Implemented" not in message and "404" not in message:
                 raise
     if result is None:
-        result = _extjs_resize(node, vmid, disk, size_delta)
+        result = _extjs_resize(node, vmid, disk, size_delta, cluster)
     upid = _unwrap_data(result)
     if isinstance(upid, str) and upid.startswith("UPID"):
         _wait_for_task(proxmox, node, upid)
     return size_delta
 
 
+def _tail_task_log(proxmox, node, upid, offset, step):
+    # Only fetches lines past offset; returns the new offset, or None if the
+    # log can't be read so the caller stops trying.
+    try:
+        lines = _unwrap_data(proxmox.nodes(node).tasks(upid).log.get(start=offset, limit=500)) or []
+    except Exception:
+        return None
+    if len(lines) == 1 and lines[0].get("t") == "no content":
+        return offset
+    percent = None
+    for line in lines:
+        match = TASK_PROGRESS_PATTERN.search(str(line.get("t") or ""))
+        if match:
+            percent = float(match.group(1))
+        offset = max(offset, int(line.get("n") or offset + 1))
+    if percent is not None:
+        _update_step_progress(*step, min(percent, 100.0))
+    return offset
+
+
 def _wait_for_task(proxmox, node, upid, timeout=1800):
     start = time.time()
+    step = getattr(STEP_LOCAL, "step", None) if config.TASK_LOG_SECONDS > 0 else None
+    log_offset = 0
+    next_tail = time.monotonic()
     while True:
         task = _unwrap_data(proxmox.nodes(node).tasks(upid).status.get())
         if not isinstance(task, dict):
@@ -406,7 +1091,12 @@ def _wait_for_task(proxmox, node, upid, timeout=1800):
             return
         if time.time() - start > timeout:
             raise RuntimeError("Task timeout")
-        time.sleep(config.POLL_INTERVAL)
+        if step is not None and time.monotonic() >= next_tail:
+            log_offset = _tail_task_log(proxmox, node, upid, log_offset, step)
+            if log_offset is None:
+                step = None
+            next_tail = time.monotonic() + config.TASK_LOG_SECONDS
+        _poll_sleep("task")
 
 
 def _wait_for_vm_status(proxmox, node, vmid, desired, timeout=180):
@@ -415,7 +1105,7 @@ def _wait_for_vm_status(proxmox, node, vmid, desired, timeout=180):
         status_data = _unwrap_data(proxmox.nodes(node).qemu(vmid).status.current.get()) or {}
         if status_data.get("status") == desired:
             return True
-        time.sleep(config.POLL_INTERVAL)
+        _poll_sleep("vm_status")
     return False
 
 
@@ -426,22 +1116,28 @@ def _run_power_task(proxmox, node, vmid, action):
         _wait_for_task(proxmox, node, upid)
 
 
-def _restart_vm_sequence(vmid):
+def _restart_vm_sequence(vmid, cluster=None):
     try:
-        proxmox = _get_proxmox()
-        node = config.PVE_NODE
+        proxmox = _get_proxmox(cluster)
+        node = _cluster(cluster)["node"]
         status_data = _unwrap_data(proxmox.nodes(node).qemu(vmid).status.current.get()) or {}
         status = status_data.get("status")
         if status != "stopped":
             _run_power_task(proxmox, node, vmid, "stop")
             _wait_for_vm_status(proxmox, node, vmid, "stopped")
         _run_power_task(proxmox, node, vmid, "start")
+        _nudge_inventory()
     except Exception:
         app.logger.exception("Failed to restart VM %s", vmid)
 
 
-def _queue_restart(vmid):
-    thread = threading.Thread(target=_restart_vm_sequence, args=(vmid,), daemon=True)
+def _queue_restart(vmid, cluster=None):
+    thread = threading.Thread(
+        target=_restart_vm_sequence,
+        args=(vmid, cluster),
+        name=f"restart-{vmid}",
+        daemon=True,
+    )
     thread.start()
 
 
@@ -475,11 +1171,11 @@ def _wait_for_ip(proxmox, node, vmid):
         ip = _read_vm_ip(proxmox, node, vmid)
         if ip:
             return ip
-        time.sleep(config.POLL_INTERVAL)
+        _poll_sleep("ip")
     return None
 
 
-def _apply_preset(proxmox, node, vmid, preset):
+def _apply_preset(proxmox, node, vmid, preset, cluster=None):
     proxmox.nodes(node).qemu(vmid).config.post(
         cores=preset["cores"],
         memory=preset["memory_mb"],
@@ -525,13 +1221,13 @@ def _apply_preset(proxmox, node, vmid, preset):
             return f"Disk {new_size}M"
         return f"Disk resize queued ({size_delta})"
 
-    result = _extjs_resize(node, vmid, config.PVE_DISK_NAME, size_delta)
+    result = _extjs_resize(node, vmid, config.PVE_DISK_NAME, size_delta, cluster)
     if isinstance(result, str) and result.startswith("UPID"):
         _wait_for_task(proxmox, node, result)
     new_size = _wait_for_disk_size(proxmox, node, vmid, target_mb)
     if new_size:
         return f"Disk {new_size}M (extjs)"
-    result = _extjs_resize(node, vmid, config.PVE_DISK_NAME, size_absolute)
+    result = _extjs_resize(node, vmid, config.PVE_DISK_NAME, size_absolute, cluster)
     if isinstance(result, str) and result.startswith("UPID"):
         _wait_for_task(proxmox, node, result)
     new_size = _wait_for_disk_size(proxmox, node, vmid, target_mb)
@@ -560,66 +1256,258 @@ def _regenerate_cloudinit(proxmox, node, vmid):
         raise
 
 
-def _provision_vm(job_id, vm_name, username, password, preset, ports_enabled):
+def _clone_template(proxmox, node, clone_name, cluster=None, attempts=5):
+    settings = _cluster(cluster)
+    # nextid does not reserve the id, so concurrent jobs can race for it.
+    for attempt in range(attempts):
+        vmid = int(_unwrap_data(proxmox.cluster.nextid.get()))
+        try:
+            upid = proxmox.nodes(node).qemu(settings["template_vmid"]).clone.post(
+                newid=vmid,
+                name=clone_name,
+                full=1,
+                storage=settings["storage"],
+            )
+            return vmid, upid
+        except Exception as exc:
+            if "already exists" not in str(exc) or attempt == attempts - 1:
+                raise
+        time.sleep(random.uniform(0.1, 0.5) * (attempt + 1))
+
+
+def _fetch_capacity(cluster):
+    settings = _cluster(cluster)
+    proxmox = _get_proxmox(cluster)
+    node = settings["node"]
+    node_status = _unwrap_data(proxmox.nodes(node).status.get()) or {}
+    storage_status = _unwrap_data(proxmox.nodes(node).storage(settings["storage"]).status.get()) or {}
+    vms = _unwrap_data(proxmox.nodes(node).qemu.get()) or []
+    running = [vm for vm in vms if vm.get("status") == "running" and not vm.get("template")]
+    memory = node_status.get("memory") or {}
+    cpuinfo = node_status.get("cpuinfo") or {}
+    return {
+        "memory_total_mb": int((memory.get("total") or 0) / (1024 * 1024)),
+        "cpus": cpuinfo.get("cpus") or 0,
+        "storage_avail_mb": int((storage_status.get("avail") or 0) / (1024 * 1024)),
+        "committed_memory_mb": sum(int((vm.get("maxmem") or 0) / (1024 * 1024)) for vm in running),
+        "committed_cores": sum(vm.get("cpus") or vm.get("maxcpu") or 0 for vm in running),
+        "running_vms": len(running),
+    }
+
+
+def _capacity_snapshot(cluster):
+    with CAPACITY_LOCK:
+        cached = CAPACITY["snapshots"].get(cluster)
+        if cached is not None and time.monotonic() - cached[1] < config.CAPACITY_TTL_SECONDS:
+            _profile_cache("capacity", True)
+            return cached[0]
+    started = time.monotonic()
+    snapshot = _fetch_capacity(cluster)
+    _profile_cache("capacity", False, time.monotonic() - started)
+    with CAPACITY_LOCK:
+        CAPACITY["snapshots"][cluster] = (snapshot, time.monotonic())
+    return snapshot
+
+
+def _capacity_needed(preset):
+    running = config.START_AFTER_CREATE
+    return {
+        "disk_mb": max(int(preset["disk_gb"] * 1024), config.BASE_DISK_MB),
+        "memory_mb": preset["memory_mb"] if running else 0,
+        "cores": preset["cores"] if running else 0,
+        "vms": 1 if running else 0,
+    }
+
+
+def _capacity_reserved(cluster, need):
+    # Caller holds CAPACITY_LOCK.
+    reserved = {key: 0 for key in need}
+    for claim_cluster, claim in CAPACITY["reservations"].values():
+        if claim_cluster == cluster:
+            for key in reserved:
+                reserved[key] += claim[key]
+    return reserved
+
+
+def _capacity_shortfall(cluster, snapshot, reserved, need):
+    settings = _cluster(cluster)
+    where = f" in cluster {cluster}" if len(CLUSTERS) > 1 else ""
+    free_disk = snapshot["storage_avail_mb"] - reserved["disk_mb"]
+    if need["disk_mb"] > free_disk:
+        return (
+            f"Not enough space on storage {settings['storage']}{where}: need {need['disk_mb']} MB, "
+            f"{max(free_disk, 0)} MB free after in-flight jobs"
+        )
+    memory_limit = int(snapshot["memory_total_mb"] * config.CAPACITY_MEMORY_OVERCOMMIT)
+    memory_used = snapshot["committed_memory_mb"] + reserved["memory_mb"]
+    if need["memory_mb"] and memory_used + need["memory_mb"] > memory_limit:
+        return (
+            f"Not enough memory on node {settings['node']}{where}: need {need['memory_mb']} MB, "
+            f"{max(memory_limit - memory_used, 0)} MB uncommitted"
+        )
+    if config.CAPACITY_CPU_OVERCOMMIT > 0:
+        cores_limit = int(snapshot["cpus"] * config.CAPACITY_CPU_OVERCOMMIT)
+        cores_used = snapshot["committed_cores"] + reserved["cores"]
+        if need["cores"] and cores_used + need["cores"] > cores_limit:
+            return (
+                f"Not enough CPU on node {settings['node']}{where}: need {need['cores']} vCPUs, "
+                f"{max(cores_limit - cores_used, 0)} of {cores_limit} available"
+            )
+    if config.CAPACITY_MAX_RUNNING_VMS:
+        running = snapshot["running_vms"] + reserved["vms"]
+        if need["vms"] and running + need["vms"] > config.CAPACITY_MAX_RUNNING_VMS:
+            return (
+                f"Node {settings['node']}{where} is at its limit of "
+                f"{config.CAPACITY_MAX_RUNNING_VMS} running VMs"
+            )
+    return None
+
+
+def _capacity_headroom(snapshot, reserved, need):
+    memory_limit = int(snapshot["memory_total_mb"] * config.CAPACITY_MEMORY_OVERCOMMIT)
+    memory_free = memory_limit - snapshot["committed_memory_mb"] - reserved["memory_mb"] - need["memory_mb"]
+    disk_free = snapshot["storage_avail_mb"] - reserved["disk_mb"] - need["disk_mb"]
+    return memory_free, disk_free
+
+
+def _reserve_capacity(job_id, preset, cluster=None):
+    # Checked against cached status snapshots plus whatever in-flight jobs
+    # have already claimed, so a burst of creates cannot all pass on the
+    # same free space. Without an explicit cluster the one with the most
+    # headroom wins; clusters that don't answer are never picked. Returns
+    # (cluster, reason); reservations are dropped when the job finishes.
+    if not config.CAPACITY_CHECK:
+        if cluster:
+            return cluster, None
+        available = [name for name in CLUSTERS if _cluster_available(name)]
+        return (available or list(CLUSTERS))[0], None
+    need = _capacity_needed(preset)
+    candidates = [cluster] if cluster else list(CLUSTERS)
+    if len(candidates) == 1:
+        try:
+            snapshots = {candidates[0]: _capacity_snapshot(candidates[0])}
+        except Exception:
+            app.logger.warning("Capacity precheck skipped: node status unavailable", exc_info=True)
+            snapshots = {}
+    else:
+        snapshots = _fan_out(_capacity_snapshot, candidates)
+    with CAPACITY_LOCK:
+        reasons = []
+        best = None
+        for name in candidates:
+            if name not in snapshots:
+                continue
+            reserved = _capacity_reserved(name, need)
+            reason = _capacity_shortfall(name, snapshots[name], reserved, need)
+            if reason:
+                reasons.append(reason)
+                continue
+            headroom = _capacity_headroom(snapshots[name], reserved, need)
+            if best is None or headroom > best[0]:
+                best = (headroom, name)
+        if best is None and reasons:
+            return None, "; ".join(reasons)
+        if best is None and len(candidates) > 1:
+            return None, "No Proxmox cluster is reachable"
+        if best is None:
+            app.logger.warning("Capacity precheck skipped: no cluster status available")
+        chosen = best[1] if best else candidates[0]
+        CAPACITY["reservations"][job_id] = (chosen, need)
+    return chosen, None
+
+
+def _release_capacity(job_id):
+    with CAPACITY_LOCK:
+        claim = CAPACITY["reservations"].pop(job_id, None)
+        if claim is not None:
+            # The finished job's real usage shows up in the next status fetch.
+            CAPACITY["snapshots"].pop(claim[0], None)
+
+
+def _remove_partial_clone(proxmox, node, vmid, clone_name):
+    try:
+        config_data = _unwrap_data(proxmox.nodes(node).qemu(vmid).config.get()) or {}
+    except Exception:
+        # Already gone.
+        return
+    if config_data.get("name") != clone_name or config_data.get("template"):
+        app.logger.warning("Not removing VM %s: it is no longer the partial clone %s", vmid, clone_name)
+        return
+    try:
+        _destroy_vm(proxmox, node, vmid)
+    except Exception:
+        app.logger.warning("Could not remove partial clone %s", vmid, exc_info=True)
+
+
+def _provision_vm(job_id, vm_name, username, password, preset, ports_enabled, cluster=None):
+    # A resumed job skips the steps that already completed and picks the
+    # VM id and IP up from the job result.
+    job = _job_snapshot(job_id) or {}
+    completed = {step["key"] for step in job.get("steps", []) if step["status"] in STEP_FINAL_STATUSES - {"error"}}
+    result = job.get("result", {})
     _update_job(job_id, status="running")
-    proxmox = _get_proxmox()
-    node = config.PVE_NODE
+    proxmox = _get_proxmox(cluster)
+    node = _cluster(cluster)["node"]
     clone_name = f"{vm_name}-vm"
+    vmid = result.get("vmid")
+    ip_address = result.get("ip")
     current_step = "clone"
 
     try:
-        _update_step(job_id, current_step, "running", "Cloning template")
-        vmid = int(_unwrap_data(proxmox.cluster.nextid.get()))
-        _set_result(job_id, vmid=vmid, name=clone_name)
-
-        upid = proxmox.nodes(node).qemu(config.TEMPLATE_VMID).clone.post(
-            newid=vmid,
-            name=clone_name,
-            full=1,
-            storage=config.PVE_STORAGE,
-        )
-        _wait_for_task(proxmox, node, _unwrap_data(upid))
-        _update_step(job_id, current_step, "done", "Clone ready")
+        if current_step not in completed:
+            if vmid is not None:
+                # Left behind by a clone that failed part-way, unless another
+                # job has since been given the same VMID.
+                _remove_partial_clone(proxmox, node, vmid, clone_name)
+            _update_step(job_id, current_step, "running", "Cloning template")
+            vmid, upid = _clone_template(proxmox, node, clone_name, cluster)
+            _set_result(job_id, vmid=vmid, name=clone_name, cluster=cluster)
+            _wait_for_task(proxmox, node, _unwrap_data(upid))
+            _update_step(job_id, current_step, "done", "Clone ready")
 
         current_step = "cloudinit"
-        _update_step(job_id, current_step, "running", "Writing cloud-init")
-        payload = {
-            "ciuser": username,
-            "cipassword": password,
-            "ipconfig0": "ip=dhcp",
-        }
-        if config.PVE_SSH_KEYS:
-            payload["sshkeys"] = config.PVE_SSH_KEYS
-        config_data = _unwrap_data(proxmox.nodes(node).qemu(vmid).config.get()) or {}
-        payload.update(_build_default_bridge_payload(config_data))
-        proxmox.nodes(node).qemu(vmid).config.post(**payload)
-        status, message = _regenerate_cloudinit(proxmox, node, vmid)
-        _update_step(job_id, current_step, status, message)
+        if current_step not in completed:
+            _update_step(job_id, current_step, "running", "Writing cloud-init")
+            payload = {
+                "ciuser": username,
+                "cipassword": password,
+                "ipconfig0": "ip=dhcp",
+            }
+            if config.PVE_SSH_KEYS:
+                payload["sshkeys"] = config.PVE_SSH_KEYS
+            config_data = _unwrap_data(proxmox.nodes(node).qemu(vmid).config.get()) or {}
+            payload.update(_build_default_bridge_payload(config_data))
+            proxmox.nodes(node).qemu(vmid).config.post(**payload)
+            status, message = _regenerate_cloudinit(proxmox, node, vmid)
+            _update_step(job_id, current_step, status, message)
 
         current_step = "hardware"
-        _update_step(job_id, current_step, "running", "Applying preset")
-        resize_note = _apply_preset(proxmox, node, vmid, preset)
-        _update_step(job_id, current_step, "done", resize_note)
+        if current_step not in completed:
+            _update_step(job_id, current_step, "running", "Applying preset")
+            resize_note = _apply_preset(proxmox, node, vmid, preset, cluster)
+            _update_step(job_id, current_step, "done", resize_note)
 
         current_step = "start"
-        if config.START_AFTER_CREATE:
-            _update_step(job_id, current_step, "running", "Starting VM")
-            proxmox.nodes(node).qemu(vmid).status.start.post()
-            _update_step(job_id, current_step, "done", "VM started")
-        else:
-            _update_step(job_id, current_step, "skipped", "Start disabled")
+        if current_step not in completed:
+            if config.START_AFTER_CREATE:
+                _update_step(job_id, current_step, "running", "Starting VM")
+                proxmox.nodes(node).qemu(vmid).status.start.post()
+                _update_step(job_id, current_step, "done", "VM started")
+            else:
+                _update_step(job_id, current_step, "skipped", "Start disabled")
 
         current_step = "ip"
-        ip_address = None
-        if config.WAIT_FOR_IP and config.START_AFTER_CREATE:
-            _update_step(job_id, current_step, "running", "Waiting for DHCP")
-            ip_address = _wait_for_ip(proxmox, node, vmid)
-            if ip_address:
-                _update_step(job_id, current_step, "done", ip_address)
+        if current_step not in completed:
+            if config.WAIT_FOR_IP and config.START_AFTER_CREATE:
+                _update_step(job_id, current_step, "running", "Waiting for DHCP")
+                ip_address = _wait_for_ip(proxmox, node, vmid)
+                if ip_address:
+                    _set_result(job_id, ip=ip_address)
+                    _update_step(job_id, current_step, "done", ip_address)
+                else:
+                    _update_step(job_id, current_step, "warn", "IP not detected")
             else:
-                _update_step(job_id, current_step, "warn", "IP not detected")
-        else:
-            _update_step(job_id, current_step, "skipped", "IP check disabled")
+                _update_step(job_id, current_step, "skipped", "IP check disabled")
 
         current_step = "ports"
         if ports_enabled:
@@ -670,6 +1558,1049 @@ def _provision_vm(job_id, vm_name, username, password, preset, ports_enabled):
     except Exception as exc:
         _update_step(job_id, current_step, "error", str(exc))
         _update_job(job_id, status="error", error=str(exc))
+    finally:
+        _release_capacity(job_id)
+
+
+def _destroy_vm(proxmox, node, vmid):
+    status_data = _unwrap_data(proxmox.nodes(node).qemu(vmid).status.current.get()) or {}
+    if status_data.get("status") != "stopped":
+        _run_power_task(proxmox, node, vmid, "stop")
+        if not _wait_for_vm_status(proxmox, node, vmid, "stopped"):
+            raise RuntimeError("VM did not stop")
+    result = proxmox.nodes(node).qemu(vmid).delete(
+        purge=1,
+        **{"destroy-unreferenced-disks": 1},
+    )
+    upid = _unwrap_data(result)
+    if isinstance(upid, str) and upid.startswith("UPID"):
+        _wait_for_task(proxmox, node, upid)
+
+
+def _release_ports(vm_names):
+    response, data, status_code = _nft_request("GET", "/api/vm-ports")
+    if response is None:
+        raise RuntimeError(data.get("error", "Port lookup failed"))
+    if status_code >= 400 or data.get("ok") is False:
+        raise RuntimeError(data.get("error") or f"Port lookup failed ({status_code})")
+    allocations = {alloc.get("name"): alloc for alloc in data.get("allocations") or []}
+    released = {}
+    for vm_name in vm_names:
+        alloc = allocations.get(vm_name)
+        if not alloc:
+            released[vm_name] = "none"
+            continue
+        response, data, status_code = _nft_request(
+            "DELETE",
+            "/api/vm-ports",
+            {"vm_name": vm_name, "vm_ip": alloc.get("ip")},
+        )
+        if response is None or status_code >= 400 or data.get("ok") is False:
+            released[vm_name] = data.get("error") or f"Release failed ({status_code})"
+        else:
+            released[vm_name] = "released"
+    return released
+
+
+def _decommission_vms(job_id, vmids, ports_enabled, cluster=None):
+    _update_job(job_id, status="running")
+    current_step = "lookup"
+    try:
+        proxmox = _get_proxmox(cluster)
+        node = _cluster(cluster)["node"]
+        _update_step(job_id, current_step, "running", "Reading inventory")
+        raw = _unwrap_data(proxmox.nodes(node).qemu.get()) or []
+        names = {vm.get("vmid"): vm.get("name") or f"vm-{vm.get('vmid')}" for vm in raw}
+        targets = [vmid for vmid in vmids if vmid in names]
+        missing = [vmid for vmid in vmids if vmid not in names]
+        vms = {
+            vmid: {"vmid": vmid, "name": names.get(vmid), "destroyed": False, "ports": None, "error": ""}
+            for vmid in vmids
+        }
+        for vmid in missing:
+            vms[vmid]["error"] = "VM not found"
+        if not targets:
+            raise RuntimeError("No matching VMs found")
+        message = f"{len(targets)} VM(s)"
+        if missing:
+            message += f", {len(missing)} not found"
+        _update_step(job_id, current_step, "warn" if missing else "done", message)
+
+        current_step = "destroy"
+        _update_step(job_id, current_step, "running", f"0/{len(targets)} destroyed")
+        if not ports_enabled:
+            _update_step(job_id, "ports", "skipped", "Ports disabled")
+
+        port_error = ""
+        released = {}
+        destroyed = 0
+        with ThreadPoolExecutor(
+            max_workers=DESTROY_MAX_WORKERS,
+            thread_name_prefix=f"decommission-{job_id}",
+        ) as pool:
+            futures = {
+                pool.submit(_in_step, job_id, current_step, _destroy_vm, proxmox, node, vmid): vmid
+                for vmid in targets
+            }
+            for future in as_completed(futures):
+                vmid = futures[future]
+                try:
+                    future.result()
+                    vms[vmid]["destroyed"] = True
+                    destroyed += 1
+                except Exception as exc:
+                    vms[vmid]["error"] = str(exc)
+                    app.logger.exception("Failed to destroy VM %s", vmid)
+                _update_step(job_id, current_step, "running", f"{destroyed}/{len(targets)} destroyed")
+
+        _forget_created_names(cluster, {vmid for vmid in targets if vms[vmid]["destroyed"]})
+
+        failed = len(targets) - destroyed
+        if destroyed == 0:
+            _update_step(job_id, current_step, "error", f"0/{len(targets)} destroyed")
+        elif failed:
+            _update_step(job_id, current_step, "warn", f"{destroyed}/{len(targets)} destroyed, {failed} failed")
+        else:
+            _update_step(job_id, current_step, "done", f"{destroyed}/{len(targets)} destroyed")
+
+        # Only VMs that are really gone lose their forwarding; one that
+        # failed to stop or delete keeps serving traffic.
+        released_count = 0
+        port_names = [names[vmid] for vmid in targets if vms[vmid]["destroyed"]]
+        if ports_enabled and not port_names:
+            _update_step(job_id, "ports", "skipped", "No VMs destroyed")
+        elif ports_enabled:
+            _update_step(job_id, "ports", "running", "Releasing allocations")
+            try:
+                gone = {(cluster or DEFAULT_CLUSTER, vmid) for vmid in targets if vms[vmid]["destroyed"]}
+                shared = _names_in_use(port_names, exclude=gone)
+                released = _in_step(job_id, "ports", _release_ports, [name for name in port_names if name not in shared])
+                released.update({name: "Kept: VM name is still used by another VM" for name in shared})
+            except Exception as exc:
+                port_error = str(exc)
+            for vmid in targets:
+                if vms[vmid]["destroyed"]:
+                    vms[vmid]["ports"] = released.get(names[vmid]) or port_error or None
+            released_count = sum(1 for value in released.values() if value == "released")
+            release_failures = [value for value in released.values() if value not in {"released", "none"}]
+            if port_error:
+                _update_step(job_id, "ports", "warn", port_error)
+            elif release_failures:
+                _update_step(job_id, "ports", "warn", release_failures[0])
+            elif released_count:
+                _update_step(job_id, "ports", "done", f"{released_count} allocation(s) released")
+            else:
+                _update_step(job_id, "ports", "skipped", "No allocations found")
+
+        current_step = "restart"
+        if released_count:
+            _update_step(job_id, current_step, "running", "Restarting nftables")
+            restart_response, restart_data, restart_status = _nft_request("POST", "/api/restart")
+            if restart_response is None:
+                _update_step(job_id, current_step, "warn", restart_data.get("error", "Restart failed"))
+            elif restart_data.get("ok"):
+                _update_step(job_id, current_step, "done", "nftables restarted")
+            else:
+                message = restart_data.get("error") or f"Restart failed ({restart_status})"
+                _update_step(job_id, current_step, "warn", message)
+        else:
+            _update_step(job_id, current_step, "skipped", "Nothing released")
+
+        _set_result(job_id, vms=[vms[vmid] for vmid in vmids])
+        if destroyed == 0:
+            _update_job(job_id, status="error", error="No VMs were destroyed")
+        else:
+            _update_job(job_id, status="done")
+    except Exception as exc:
+        _update_step(job_id, current_step, "error", str(exc))
+        _update_job(job_id, status="error", error=str(exc))
+
+
+def _start_decommission(vmids, ports_enabled, cluster=None):
+    if _cluster(cluster)["template_vmid"] in vmids:
+        return jsonify({"error": "Template VM cannot be destroyed"}), 400
+
+    job = _new_job(DESTROY_STEP_ORDER, kind="destroy")
+    _cleanup_jobs()
+    with JOBS_LOCK:
+        JOBS[job["id"]] = job
+
+    thread = threading.Thread(
+        target=_decommission_vms,
+        args=(job["id"], vmids, ports_enabled, cluster),
+        name=f"destroy-{job['id']}",
+        daemon=True,
+    )
+    thread.start()
+
+    return jsonify({"job_id": job["id"]})
+
+
+def _collect_vms(proxmox, node, cluster=None):
+    raw = _unwrap_data(proxmox.nodes(node).qemu.get()) or []
+    raw = sorted(raw, key=lambda item: item.get("vmid") or 0)
+    items = []
+    for vm in raw:
+        vmid = vm.get("vmid")
+        if vmid is None:
+            continue
+        name = vm.get("name") or f"vm-{vmid}"
+        status = vm.get("status") or "unknown"
+        ip = None
+        if status == "running":
+            ip = _read_vm_ip(proxmox, node, vmid)
+        maxmem = vm.get("maxmem")
+        maxmem_mb = int(maxmem / (1024 * 1024)) if maxmem else None
+        maxcpu = vm.get("maxcpu") or vm.get("cpus") or vm.get("cores")
+        if not maxcpu:
+            config_data = _unwrap_data(proxmox.nodes(node).qemu(vmid).config.get()) or {}
+            maxcpu = config_data.get("cores")
+        items.append(
+            {
+                "vmid": vmid,
+                "name": name,
+                "status": status,
+                "ip": ip,
+                "maxmem_mb": maxmem_mb,
+                "maxcpu": maxcpu,
+                "node": node,
+                "cluster": cluster or DEFAULT_CLUSTER,
+            }
+        )
+    return items
+
+
+def _collect_cluster_vms(cluster):
+    return _collect_vms(_get_proxmox(cluster), _cluster(cluster)["node"], cluster)
+
+
+def _refresh_inventory():
+    # Inventory items are keyed by (cluster, vmid). A cluster that can't be
+    # reached keeps its last known VMs instead of dropping out of the list.
+    results = _fan_out(_collect_cluster_vms)
+    with INVENTORY_LOCK:
+        previous = INVENTORY["items"]
+        current = {key: item for key, item in previous.items() if key[0] not in results and key[0] in CLUSTERS}
+        for items in results.values():
+            current.update({_vm_key(item): item for item in items})
+        changed = [key for key, item in current.items() if previous.get(key) != item]
+        changed += [key for key in previous if key not in current]
+        for key in changed:
+            INVENTORY["version"] += 1
+            INVENTORY["changes"].append((INVENTORY["version"], key))
+            if key in previous:
+                _index_remove(previous[key])
+            if key in current:
+                _index_add(current[key])
+        INVENTORY["items"] = current
+        INVENTORY["refreshed"] = time.monotonic()
+        INVENTORY["loaded"].update(results)
+        if changed:
+            INVENTORY_LOCK.notify_all()
+        return [current[(cluster, vmid)] for vmid, cluster in VM_INDEX["vmids"]]
+
+
+def _inventory_unavailable():
+    # With no cluster ever listed there is nothing to serve, and an empty
+    # list would make an outage look like an empty fleet.
+    with INVENTORY_LOCK:
+        if INVENTORY["loaded"]:
+            return None
+    return jsonify({"error": "No Proxmox cluster could be listed", "clusters": _cluster_status()}), 503
+
+
+def _vm_key(item):
+    return item["cluster"], item["vmid"]
+
+
+def _vmid_key(item):
+    return item["vmid"], item["cluster"]
+
+
+def _name_key(item):
+    return (item.get("name") or "").lower(), item["vmid"], item["cluster"]
+
+
+def _index_add(item):
+    # Caller holds INVENTORY_LOCK.
+    key = _vm_key(item)
+    bisect.insort(VM_INDEX["vmids"], _vmid_key(item))
+    bisect.insort(VM_INDEX["names"], _name_key(item))
+    VM_INDEX["by_status"].setdefault(item.get("status"), set()).add(key)
+    VM_INDEX["by_node"].setdefault(item.get("node"), set()).add(key)
+    VM_INDEX["by_cluster"].setdefault(item["cluster"], set()).add(key)
+    if item.get("ip"):
+        VM_INDEX["by_ip"][item["ip"]] = key
+
+
+def _index_remove(item):
+    # Caller holds INVENTORY_LOCK.
+    key = _vm_key(item)
+    for index, value in (("vmids", _vmid_key(item)), ("names", _name_key(item))):
+        entries = VM_INDEX[index]
+        position = bisect.bisect_left(entries, value)
+        if position < len(entries) and entries[position] == value:
+            del entries[position]
+    VM_INDEX["by_status"].get(item.get("status"), set()).discard(key)
+    VM_INDEX["by_node"].get(item.get("node"), set()).discard(key)
+    VM_INDEX["by_cluster"].get(item["cluster"], set()).discard(key)
+    if item.get("ip") and VM_INDEX["by_ip"].get(item["ip"]) == key:
+        VM_INDEX["by_ip"].pop(item["ip"], None)
+
+
+def _encode_page_cursor(sort, key):
+    raw = json.dumps([sort, list(key) if isinstance(key, tuple) else key])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_page_cursor(cursor, sort):
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, key = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if cursor_sort != sort:
+        raise ValueError("Cursor does not match sort order")
+    # Keys are compared against the index, so each element must have the
+    # type the index holds there: (vmid, cluster) or (name, vmid, cluster).
+    types = (str, int, str) if sort.lstrip("-") == "name" else (int, str)
+    if (
+        not isinstance(key, list)
+        or len(key) != len(types)
+        or any(isinstance(value, bool) or not isinstance(value, kind) for value, kind in zip(key, types))
+    ):
+        raise ValueError("Invalid cursor")
+    return tuple(key)
+
+
+def _query_vms(q="", status=None, ip=None, node=None, cluster=None, sort="vmid", limit=50, cursor=None):
+    # Caller holds INVENTORY_LOCK. Cost depends on the page size, or on the
+    # number of filter matches when that is smaller, not on the fleet.
+    items = INVENTORY["items"]
+    descending = sort.startswith("-")
+    by_name = sort.lstrip("-") == "name"
+    ordered = VM_INDEX["names"] if by_name else VM_INDEX["vmids"]
+    prefix = q.lower()
+
+    candidates = None
+    if ip:
+        candidates = {VM_INDEX["by_ip"][ip]} if ip in VM_INDEX["by_ip"] else set()
+    for field, value in (("by_status", status), ("by_node", node), ("by_cluster", cluster)):
+        if value:
+            matches = VM_INDEX[field].get(value, set())
+            candidates = matches if candidates is None else candidates & matches
+
+    if by_name and prefix:
+        low = bisect.bisect_left(ordered, (prefix,))
+        high = bisect.bisect_left(ordered, (prefix + "\uffff",))
+    else:
+        low, high = 0, len(ordered)
+    if cursor is not None:
+        if descending:
+            high = min(high, bisect.bisect_left(ordered, cursor))
+        else:
+            low = max(low, bisect.bisect_right(ordered, cursor))
+    if candidates is not None and len(candidates) < high - low:
+        # A selective filter: order its few matches instead of walking the
+        # whole index range looking for them.
+        sort_key = _name_key if by_name else _vmid_key
+        first, last = ordered[low], ordered[high - 1]
+        matches = [
+            key
+            for key in (sort_key(items[item_key]) for item_key in candidates)
+            if first <= key <= last
+            and (by_name or not prefix or (items[(key[-1], key[-2])].get("name") or "").lower().startswith(prefix))
+        ]
+        keys = (heapq.nlargest if descending else heapq.nsmallest)(limit + 1, matches)
+    else:
+        positions = range(high - 1, low - 1, -1) if descending else range(low, high)
+        keys = (ordered[position] for position in positions)
+
+    page = []
+    last_key = None
+    has_more = False
+    for key in keys:
+        item_key = (key[-1], key[-2])
+        if candidates is not None and item_key not in candidates:
+            continue
+        item = items[item_key]
+        if prefix and not by_name and not (item.get("name") or "").lower().startswith(prefix):
+            continue
+        if len(page) == limit:
+            has_more = True
+            break
+        page.append(item)
+        last_key = key
+    next_cursor = _encode_page_cursor(sort, last_key) if has_more else None
+    return page, next_cursor
+
+
+def _parse_inventory_cursor(cursor):
+    epoch, _, version = (cursor or "").partition("-")
+    if epoch != INVENTORY["epoch"] or not version.isdigit():
+        return None
+    return int(version)
+
+
+def _inventory_delta(version):
+    # Caller holds INVENTORY_LOCK.
+    current = INVENTORY["version"]
+    changes = INVENTORY["changes"]
+    cursor = f"{INVENTORY['epoch']}-{current}"
+    items = INVENTORY["items"]
+    expired = version is not None and version < current and (not changes or changes[0][0] > version + 1)
+    if version is None or version > current or expired:
+        return {
+            "cursor": cursor,
+            "reset": True,
+            "upserted": [items[(cluster, vmid)] for vmid, cluster in VM_INDEX["vmids"]],
+            "removed": [],
+        }
+    touched = sorted({key for change_version, key in changes if change_version > version}, key=lambda key: key[::-1])
+    return {
+        "cursor": cursor,
+        "reset": False,
+        "upserted": [items[key] for key in touched if key in items],
+        "removed": [{"cluster": key[0], "vmid": key[1]} for key in touched if key not in items],
+    }
+
+
+def _inventory_refresher():
+    while True:
+        with INVENTORY_LOCK:
+            if time.monotonic() - INVENTORY["watched"] > config.INVENTORY_IDLE_SECONDS:
+                INVENTORY["refresher"] = None
+                return
+        # Cleared before refreshing, so a nudge that lands mid-refresh
+        # triggers another pass right away.
+        INVENTORY_NUDGE.clear()
+        try:
+            _refresh_inventory()
+        except Exception:
+            app.logger.exception("Failed to refresh VM inventory")
+        INVENTORY_NUDGE.wait(config.INVENTORY_REFRESH_SECONDS)
+
+
+def _watch_inventory():
+    with INVENTORY_LOCK:
+        INVENTORY["watched"] = time.monotonic()
+        if INVENTORY["refresher"] is not None:
+            return
+        thread = threading.Thread(target=_inventory_refresher, name="inventory-refresher", daemon=True)
+        INVENTORY["refresher"] = thread
+    thread.start()
+
+
+def _nudge_inventory():
+    INVENTORY_NUDGE.set()
+
+
+def _fetch_rrd_columns(cluster, vmid, timeframe):
+    proxmox = _get_proxmox(cluster)
+    raw = _unwrap_data(
+        proxmox.nodes(_cluster(cluster)["node"]).qemu(vmid).rrddata.get(timeframe=timeframe, cf="AVERAGE")
+    ) or []
+    rows = sorted((row for row in raw if row.get("time") is not None), key=lambda row: row["time"])
+    columns = {"time": [row["time"] for row in rows]}
+    for field in RRD_FIELDS:
+        columns[field] = [row.get(field) for row in rows]
+    return columns
+
+
+def _rrd_columns(cluster, vmid, timeframe):
+    # Single-flight: concurrent viewers of the same VM wait for one upstream
+    # fetch instead of each calling rrddata.
+    key = (cluster, vmid, timeframe)
+    while True:
+        with RRD_LOCK:
+            now = time.monotonic()
+            entry = RRD_CACHE.get(key)
+            if entry and entry["expires"] > now:
+                _profile_cache("rrd", True)
+                return entry["columns"]
+            event = RRD_INFLIGHT.get(key)
+            leader = event is None
+            if leader:
+                event = threading.Event()
+                RRD_INFLIGHT[key] = event
+        if not leader:
+            event.wait(30)
+            continue
+        started = time.monotonic()
+        try:
+            columns = _fetch_rrd_columns(cluster, vmid, timeframe)
+            with RRD_LOCK:
+                now = time.monotonic()
+                for stale in [item for item, cached in RRD_CACHE.items() if cached["expires"] <= now]:
+                    RRD_CACHE.pop(stale)
+                RRD_CACHE[key] = {"columns": columns, "expires": now + RRD_TIMEFRAMES[timeframe]}
+            _profile_cache("rrd", False, time.monotonic() - started)
+            return columns
+        finally:
+            with RRD_LOCK:
+                RRD_INFLIGHT.pop(key, None)
+            event.set()
+
+
+def _downsample(columns, points):
+    # Averages each column over equal-width buckets; time keeps the bucket start.
+    total = len(columns["time"])
+    if total <= points:
+        return columns
+    result = {name: [] for name in columns}
+    for bucket in range(points):
+        lo = bucket * total // points
+        hi = (bucket + 1) * total // points
+        result["time"].append(columns["time"][lo])
+        for name, values in columns.items():
+            if name == "time":
+                continue
+            window = [value for value in values[lo:hi] if value is not None]
+            result[name].append(round(sum(window) / len(window), 4) if window else None)
+    return result
+
+
+def _port_allocations_by_name():
+    # Returns (allocations, error); a failed lookup is reported on every
+    # row rather than exported as VMs without ports.
+    response, data, status_code = _nft_request("GET", "/api/vm-ports")
+    if response is None or status_code >= 400 or data.get("ok") is False:
+        return {}, f"Port lookup failed: {data.get('error') or status_code}"
+    return {alloc.get("name"): alloc for alloc in data.get("allocations") or [] if alloc.get("name")}, ""
+
+
+def _export_row(proxmox, node, cluster, vm):
+    vmid = vm["vmid"]
+    row = dict.fromkeys(EXPORT_FIELDS)
+    row.update(
+        cluster=cluster,
+        vmid=vmid,
+        name=vm.get("name") or f"vm-{vmid}",
+        node=node,
+        status=vm.get("status") or "unknown",
+        error="",
+    )
+    try:
+        config_data = _unwrap_data(proxmox.nodes(node).qemu(vmid).config.get()) or {}
+        disk_size = None
+        match = re.search(r"size=([^,]+)", str(config_data.get(config.PVE_DISK_NAME) or ""))
+        if match:
+            disk_size = _parse_size_to_mb(match.group(1))
+        row.update(
+            ip=_read_vm_ip(proxmox, node, vmid) if row["status"] == "running" else None,
+            cores=config_data.get("cores"),
+            memory_mb=config_data.get("memory"),
+            disk_size_mb=disk_size,
+        )
+    except Exception as exc:
+        # Typically a VM destroyed mid-export. Raising here would cut the
+        # stream short after the 200 has gone out, so the row is marked.
+        row["error"] = str(exc) or type(exc).__name__
+    return row
+
+
+def _list_cluster_vms(cluster):
+    raw = _unwrap_data(_get_proxmox(cluster).nodes(_cluster(cluster)["node"]).qemu.get()) or []
+    return sorted((vm for vm in raw if vm.get("vmid") is not None), key=lambda vm: vm["vmid"])
+
+
+def _names_in_use(names, exclude=()):
+    # nft_port_panel allocations are keyed by VM name alone, so a name held
+    # by any VM on any cluster must not have its ports created or released
+    # for another one. Answered from the shared inventory, refreshed first
+    # only when it is older than one refresh interval; unreachable clusters
+    # count with their last known VMs. `exclude` holds (cluster, vmid) keys.
+    with INVENTORY_LOCK:
+        refreshed = INVENTORY["refreshed"]
+    if refreshed is None or time.monotonic() - refreshed > config.INVENTORY_REFRESH_SECONDS:
+        _refresh_inventory()
+    found = set()
+    with INVENTORY_LOCK:
+        for name in set(names):
+            lowered = (name or "").lower()
+            index = bisect.bisect_left(VM_INDEX["names"], (lowered,))
+            for entry in VM_INDEX["names"][index:]:
+                if entry[0] != lowered:
+                    break
+                key = (entry[2], entry[1])
+                if key not in exclude and INVENTORY["items"][key].get("name") == name:
+                    found.add(name)
+                    break
+    return found
+
+
+def _export_targets(listings):
+    # Yields (proxmox, node, cluster, vm) per VM, or a finished error row
+    # for a cluster that couldn't be listed, so an export never silently
+    # leaves a cluster out.
+    status = _cluster_status()
+    for cluster in CLUSTERS:
+        if cluster not in listings:
+            row = dict.fromkeys(EXPORT_FIELDS)
+            row.update(cluster=cluster, error=f"Cluster unreachable: {status[cluster]['error'] or 'no answer'}")
+            yield row
+            continue
+        proxmox = _get_proxmox(cluster)
+        node = _cluster(cluster)["node"]
+        for vm in listings[cluster]:
+            yield proxmox, node, cluster, vm
+
+
+def _export_rows():
+    # Rows come out cluster by cluster in vmid order while at most
+    # EXPORT_WORKERS * 2 VMs are being enriched, so memory stays flat
+    # however large the fleet is.
+    with ThreadPoolExecutor(max_workers=config.EXPORT_WORKERS) as executor:
+        ports_future = executor.submit(_port_allocations_by_name)
+        listings = _fan_out(_list_cluster_vms)
+        seen = set()
+        shared = set()
+        for vms in listings.values():
+            for vm in vms:
+                name = vm.get("name")
+                if name in seen:
+                    shared.add(name)
+                seen.add(name)
+        pending = deque()
+        ports = None
+        for target in _export_targets(listings):
+            if isinstance(target, dict):
+                future = Future()
+                future.set_result(target)
+                pending.append(future)
+            else:
+                pending.append(executor.submit(_export_row, *target))
+            if len(pending) < config.EXPORT_WORKERS * 2:
+                continue
+            if ports is None:
+                ports = ports_future.result()
+            yield _attach_ports(pending.popleft().result(), *ports, shared)
+        if ports is None:
+            ports = ports_future.result()
+        while pending:
+            yield _attach_ports(pending.popleft().result(), *ports, shared)
+
+
+def _attach_ports(row, allocations, error, shared):
+    if row["vmid"] is None:
+        # An unreachable cluster's error row.
+        return row
+    if row["name"] in shared:
+        # Allocations are keyed by name; which cluster's VM owns them is unknown.
+        allocations = {}
+        error = error or "Ports not matched: VM name is used by several VMs"
+    if error:
+        row["error"] = "; ".join(message for message in (row["error"], error) if message)
+    alloc = allocations.get(row["name"]) or {}
+    row["ssh_port"] = alloc.get("ssh_port")
+    range_start = alloc.get("range_start")
+    range_end = alloc.get("range_end")
+    row["port_range"] = f"{range_start}-{range_end}" if range_start and range_end else None
+    return row
+
+
+def _export_stream(rows, fmt):
+    if fmt == "ndjson":
+        for row in rows:
+            yield json.dumps(row) + "\n"
+        return
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _jobs_in_flight():
+    counts = {(("kind", kind),): 0 for kind in ("provision", "destroy")}
+    with JOBS_LOCK:
+        for job in JOBS.values():
+            if job["status"] in {"queued", "running"}:
+                key = (("kind", job["kind"]),)
+                counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+def _worker_threads():
+    counts = {(("kind", kind),): 0 for kind in ("provision", "destroy", "restart")}
+    for thread in threading.enumerate():
+        kind = thread.name.split("-", 1)[0]
+        if (("kind", kind),) in counts:
+            counts[(("kind", kind),)] += 1
+    return counts
+
+
+def _jobs_stored():
+    with JOBS_LOCK:
+        return len(JOBS)
+
+
+metrics.describe(
+    "pve_panel_http_request_duration_seconds",
+    "histogram",
+    "Panel request latency by Flask route, method and status.",
+)
+metrics.describe(
+    "pve_panel_upstream_request_duration_seconds",
+    "histogram",
+    "Upstream call latency by service, endpoint, method and status.",
+)
+metrics.describe(
+    "pve_panel_upstream_errors_total",
+    "counter",
+    "Upstream calls that failed or returned an HTTP error status.",
+)
+metrics.describe(
+    "pve_panel_wait_polls_total",
+    "counter",
+    "Wait-loop polls that had to sleep and retry, by loop.",
+)
+metrics.gauge("pve_panel_jobs_in_flight", "Queued or running jobs by kind.", _jobs_in_flight)
+metrics.gauge("pve_panel_worker_threads", "Live background worker threads by kind.", _worker_threads)
+metrics.gauge("pve_panel_jobs_stored", "Jobs held in the in-memory job store.", _jobs_stored)
+metrics.gauge("pve_panel_threads", "Live Python threads.", threading.active_count)
+
+
+def _probe_cluster(cluster):
+    _get_proxmox(cluster).version.get()
+
+
+def _probe_clusters():
+    # Unlike _fan_out, clusters in backoff are probed too; a success clears
+    # the backoff so inventory picks a recovered cluster up again sooner.
+    futures = {_cluster_future(_probe_cluster, name): name for name in CLUSTERS}
+    done, _ = wait(futures, timeout=config.PVE_CLUSTER_TIMEOUT)
+    results = {}
+    for future, name in futures.items():
+        entry = {"ok": False, "auth": None, "latency_ms": None, "error": ""}
+        if future not in done:
+            entry["error"] = f"No answer within {config.PVE_CLUSTER_TIMEOUT:g}s"
+        elif future.exception() is not None:
+            exc = future.exception()
+            entry["error"] = str(exc) or type(exc).__name__
+            if isinstance(exc, AuthenticationError) or getattr(exc, "status_code", None) in {401, 403}:
+                entry["auth"] = False
+        else:
+            _, elapsed = future.result()
+            entry.update(ok=True, auth=True, latency_ms=round(elapsed * 1000, 1))
+        _mark_cluster(name, entry["error"] or None)
+        results[name] = entry
+    return results
+
+
+def _probe_nft():
+    if not config.NFT_PORT_PANEL_URL or not config.NFT_PORT_PANEL_TOKEN:
+        return {"configured": False, "ok": None, "auth": None, "latency_ms": None, "error": ""}
+    started = time.monotonic()
+    response, data, status_code = _nft_request("GET", "/api/vm-ports")
+    ok = response is not None and status_code < 400 and data.get("ok") is not False
+    auth = None
+    if response is not None:
+        auth = status_code not in {401, 403}
+    return {
+        "configured": True,
+        "ok": ok,
+        "auth": auth,
+        "latency_ms": round((time.monotonic() - started) * 1000, 1),
+        "error": "" if ok else data.get("error") or f"HTTP {status_code}",
+    }
+
+
+def _probe_jobs():
+    started = time.monotonic()
+    with JOBS_LOCK:
+        lock_ms = (time.monotonic() - started) * 1000
+        active = sum(
+            1 for job in JOBS.values() if job["kind"] == "provision" and job["status"] in {"queued", "running"}
+        )
+    return {
+        "lock_ms": round(lock_ms, 2),
+        "active_provisions": active,
+        "provision_threads": _worker_threads()[(("kind", "provision"),)],
+    }
+
+
+def _run_health_probes():
+    # The job store is sampled first: upstream probes can take up to
+    # PVE_CLUSTER_TIMEOUT, and lock latency should reflect this cycle.
+    jobs = _probe_jobs()
+    nft = _probe_nft()
+    clusters = _probe_clusters()
+    with HEALTH_LOCK:
+        HEALTH.update(checked=time.monotonic(), checked_at=_now(), jobs=jobs, nft=nft, clusters=clusters)
+
+
+def _health_prober():
+    while True:
+        try:
+            _run_health_probes()
+        except Exception:
+            app.logger.exception("Health probe failed")
+        time.sleep(config.HEALTH_PROBE_SECONDS)
+
+
+def _watch_health():
+    with HEALTH_LOCK:
+        if HEALTH["prober"] is not None:
+            return
+        thread = threading.Thread(target=_health_prober, name="health-prober", daemon=True)
+        HEALTH["prober"] = thread
+    thread.start()
+
+
+def _readiness():
+    with HEALTH_LOCK:
+        snapshot = {key: copy.deepcopy(HEALTH[key]) for key in ("checked", "checked_at", "clusters", "nft", "jobs")}
+    reasons = []
+    checked = snapshot.pop("checked")
+    if checked is None:
+        reasons.append("Health probes have not run yet")
+    else:
+        # One cycle can legitimately take the probe interval plus the
+        # cluster and nft timeouts; anything older means the prober is stuck.
+        max_age = 2 * config.HEALTH_PROBE_SECONDS + config.PVE_CLUSTER_TIMEOUT + 10
+        if time.monotonic() - checked > max_age:
+            reasons.append("Health probes are stale")
+        if not any(entry["ok"] for entry in snapshot["clusters"].values()):
+            reasons.append("No Proxmox cluster is reachable")
+        jobs = snapshot["jobs"]
+        if config.READY_MAX_ACTIVE_JOBS and jobs["active_provisions"] >= config.READY_MAX_ACTIVE_JOBS:
+            reasons.append(
+                f"{jobs['active_provisions']} provisioning jobs in flight (limit {config.READY_MAX_ACTIVE_JOBS})"
+            )
+        if config.READY_MAX_JOB_LOCK_MS and jobs["lock_ms"] >= config.READY_MAX_JOB_LOCK_MS:
+            reasons.append(f"Job store lock took {jobs['lock_ms']:g} ms (limit {config.READY_MAX_JOB_LOCK_MS:g})")
+    return dict(snapshot, ready=not reasons, reasons=reasons)
+
+
+def _server_timing(profile, total_ms):
+    groups = {}
+    for entry in profile:
+        key = (entry["service"], entry["method"], entry["endpoint"], entry["cache"])
+        group = groups.setdefault(key, [0, 0.0])
+        group[0] += 1
+        group[1] += entry["duration_ms"]
+    parts = [f"app;dur={total_ms:.1f}"]
+    ordered = sorted(groups.items(), key=lambda item: item[1][1], reverse=True)
+    for index, ((service, method, endpoint, cache), (count, duration)) in enumerate(ordered):
+        desc = f"{service} {method} {endpoint} x{count}"
+        if cache == "hit":
+            desc += " (cached)"
+        parts.append(f'{service}{index};dur={duration:.1f};desc="{desc}"')
+    return ", ".join(parts)
+
+
+def _write_slow_request(route, total_ms, status_code, profile):
+    if not config.SLOW_REQUEST_LOG or random.random() >= config.SLOW_REQUEST_SAMPLE_RATE:
+        return
+    entry = {
+        "at": _now(),
+        "method": request.method,
+        "path": request.full_path.rstrip("?"),
+        "route": route,
+        "status": status_code,
+        "duration_ms": round(total_ms, 1),
+        "upstream": profile,
+    }
+    try:
+        with SLOW_LOG_LOCK:
+            with open(config.SLOW_REQUEST_LOG, "a", encoding="utf-8") as handle:
+                handle.write(json.dumps(entry) + "\n")
+    except OSError:
+        app.logger.exception("Failed to write slow request log")
+
+
+def _conditional_json(payload, volatile=()):
+    # Weak ETag over the payload; volatile keys (e.g. uptime) don't invalidate it.
+    stable = {key: value for key, value in payload.items() if key not in volatile}
+    digest = hashlib.blake2b(app.json.dumps(stable).encode("utf-8"), digest_size=12).hexdigest()
+    response = jsonify(payload)
+    response.set_etag(digest, weak=True)
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+def _asset_version(filename):
+    path = os.path.join(app.static_folder, filename)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    cached = ASSET_VERSIONS.get(filename)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with open(path, "rb") as handle:
+        version = hashlib.blake2b(handle.read(), digest_size=6).hexdigest()
+    ASSET_VERSIONS[filename] = (mtime, version)
+    return version
+
+
+@app.context_processor
+def _asset_helpers():
+    def asset_url(filename):
+        version = _asset_version(filename)
+        if version is None:
+            return url_for("static", filename=filename)
+        return url_for("static", filename=filename, v=version)
+
+    return {"asset_url": asset_url}
+
+
+def _pick_encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted["br"]:
+        return "br"
+    if accepted["gzip"]:
+        return "gzip"
+    return None
+
+
+def _encode(data, encoding):
+    if encoding == "br":
+        return brotli.compress(data, quality=5)
+    return gzip.compress(data, compresslevel=6)
+
+
+ENCODED_ETAG = re.compile(r'-(?:gzip|br)"')
+
+
+@app.before_request
+def _strip_encoded_etags():
+    # Compressed static files go out with the encoding appended to their
+    # strong ETag; send_file only knows the plain one, so the suffix is
+    # dropped from If-None-Match for it to answer 304.
+    if request.endpoint == "static" and "HTTP_IF_NONE_MATCH" in request.environ:
+        request.environ["HTTP_IF_NONE_MATCH"] = ENCODED_ETAG.sub('"', request.environ["HTTP_IF_NONE_MATCH"])
+
+
+def _suffix_etag(response, encoding):
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(f"{etag}-{encoding}")
+
+
+@app.after_request
+def _compress_response(response):
+    if request.endpoint == "static" and request.args.get("v"):
+        if request.args.get("v") == _asset_version(request.view_args.get("filename", "")):
+            response.cache_control.no_cache = None
+            response.cache_control.public = True
+            response.cache_control.max_age = 31536000
+            response.cache_control.immutable = True
+    if response.status_code == 304 and request.endpoint == "static":
+        # Keep the revalidated ETag matching the representation cached.
+        encoding = _pick_encoding()
+        if encoding is not None and response.mimetype in COMPRESSIBLE_MIMETYPES:
+            response.vary.add("Accept-Encoding")
+            _suffix_etag(response, encoding)
+        return response
+    if (
+        response.status_code != 200
+        or "Content-Encoding" in response.headers
+        or "Content-Range" in response.headers
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        or (response.is_streamed and not response.direct_passthrough)
+    ):
+        return response
+    encoding = _pick_encoding()
+    if encoding is None:
+        return response
+    response.vary.add("Accept-Encoding")
+
+    if request.endpoint == "static":
+        key = (request.path, response.get_etag()[0], encoding)
+        data = COMPRESSED_STATIC.get(key)
+        if data is None:
+            response.direct_passthrough = False
+            data = _encode(response.get_data(), encoding)
+            COMPRESSED_STATIC[key] = data
+        response.direct_passthrough = False
+    else:
+        raw = response.get_data()
+        if len(raw) < config.COMPRESS_MIN_BYTES:
+            return response
+        data = _encode(raw, encoding)
+    response.set_data(data)
+    response.headers["Content-Encoding"] = encoding
+    _suffix_etag(response, encoding)
+    return response
+
+
+@app.before_request
+def _start_request_timer():
+    g.request_started = time.monotonic()
+    if config.APP_PROFILE_REQUESTS and request.path.startswith("/api/"):
+        g.profile = []
+
+
+@app.after_request
+def _attach_profile(response):
+    profile = g.get("profile")
+    started = g.get("request_started")
+    if profile is None or started is None:
+        return response
+    total_ms = (time.monotonic() - started) * 1000
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    response.headers["Server-Timing"] = _server_timing(profile, total_ms)
+    if config.APP_PROFILE_TRACE and request.args.get("trace") and response.is_json:
+        data = response.get_json(silent=True)
+        if isinstance(data, dict):
+            data["_trace"] = {
+                "route": route,
+                "duration_ms": round(total_ms, 1),
+                "upstream_ms": round(sum(entry["duration_ms"] for entry in profile), 1),
+                "calls": profile,
+            }
+            response.set_data(app.json.dumps(data))
+    if total_ms >= config.SLOW_REQUEST_MS:
+        _write_slow_request(route, total_ms, response.status_code, profile)
+    return response
+
+
+@app.after_request
+def _observe_request(response):
+    started = g.get("request_started")
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        metrics.observe(
+            "pve_panel_http_request_duration_seconds",
+            time.monotonic() - started,
+            route=route,
+            method=request.method,
+            status=response.status_code,
+        )
+    return response
+
+
+@app.route("/metrics")
+def metrics_endpoint():
+    if config.APP_METRICS_TOKEN:
+        expected = f"Bearer {config.APP_METRICS_TOKEN}"
+        if not secrets.compare_digest(request.headers.get("Authorization", ""), expected):
+            return jsonify({"error": "Not authorized"}), 401
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/healthz")
+def healthz():
+    _watch_health()
+    return jsonify({"status": "ok", "uptime_seconds": round(time.monotonic() - HEALTH["started"], 1)})
+
+
+@app.route("/readyz")
+def readyz():
+    # Answered from the background probe results only, so load balancer
+    # checks never reach Proxmox or nft_port_panel themselves.
+    _watch_health()
+    readiness = _readiness()
+    return jsonify(readiness), 200 if readiness["ready"] else 503
 
 
 @app.route("/")
@@ -679,8 +2610,9 @@ def index():
         "index.html",
         presets=config.PRESETS,
         default_username=config.DEFAULT_USERNAME,
-        template_vmid=config.TEMPLATE_VMID,
-        storage=config.PVE_STORAGE,
+        template_vmid=_cluster()["template_vmid"],
+        storage=_cluster()["storage"],
+        clusters=list(CLUSTERS),
         public_domain=config.APP_PUBLIC_DOMAIN,
         ports_panel_url=config.NFT_PORT_PANEL_UI_URL,
         include_app_js=True,
@@ -711,44 +2643,91 @@ def logout():
 @app.route("/api/vms")
 @require_auth
 def list_vms():
-    proxmox = _get_proxmox()
-    node = config.PVE_NODE
-    raw = _unwrap_data(proxmox.nodes(node).qemu.get()) or []
-    raw = sorted(raw, key=lambda item: item.get("vmid") or 0)
-    items = []
-    for vm in raw:
-        vmid = vm.get("vmid")
-        if vmid is None:
-            continue
-        name = vm.get("name") or f"vm-{vmid}"
-        status = vm.get("status") or "unknown"
-        ip = None
-        if status == "running":
-            ip = _read_vm_ip(proxmox, node, vmid)
-        maxmem = vm.get("maxmem")
-        maxmem_mb = int(maxmem / (1024 * 1024)) if maxmem else None
-        maxcpu = vm.get("maxcpu") or vm.get("cpus") or vm.get("cores")
-        if not maxcpu:
-            config_data = _unwrap_data(proxmox.nodes(node).qemu(vmid).config.get()) or {}
-            maxcpu = config_data.get("cores")
-        items.append(
-            {
-                "vmid": vmid,
-                "name": name,
-                "status": status,
-                "ip": ip,
-                "maxmem_mb": maxmem_mb,
-                "maxcpu": maxcpu,
-            }
+    if not any(key in request.args for key in VM_FILTERS):
+        vms = _refresh_inventory()
+        return _inventory_unavailable() or _conditional_json({"vms": vms, "clusters": _cluster_status()})
+
+    sort = request.args.get("sort") or "vmid"
+    if sort not in VM_SORTS:
+        return jsonify({"error": f"Unsupported sort: {sort}"}), 400
+    limit = request.args.get("limit", type=int) or config.VM_PAGE_SIZE
+    limit = max(1, min(limit, config.VM_PAGE_SIZE_MAX))
+    try:
+        cursor = _decode_page_cursor(request.args.get("cursor"), sort)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+
+    _watch_inventory()
+    if INVENTORY["refreshed"] is None:
+        _refresh_inventory()
+    unavailable = _inventory_unavailable()
+    if unavailable:
+        return unavailable
+    with INVENTORY_LOCK:
+        page, next_cursor = _query_vms(
+            q=(request.args.get("q") or "").strip(),
+            status=request.args.get("status") or None,
+            ip=request.args.get("ip") or None,
+            node=request.args.get("node") or None,
+            cluster=request.args.get("cluster") or None,
+            sort=sort,
+            limit=limit,
+            cursor=cursor,
         )
-    return jsonify({"vms": items})
+        inventory_cursor = f"{INVENTORY['epoch']}-{INVENTORY['version']}"
+    return _conditional_json(
+        {
+            "vms": page,
+            "next_cursor": next_cursor,
+            "inventory_cursor": inventory_cursor,
+            "clusters": _cluster_status(),
+        }
+    )
+
+
+@app.route("/api/vms/changes")
+@require_auth
+def vm_changes():
+    wait = request.args.get("wait", type=float) or 0
+    wait = min(max(wait, 0), config.INVENTORY_LONG_POLL_SECONDS)
+    _watch_inventory()
+    if INVENTORY["refreshed"] is None:
+        _refresh_inventory()
+    unavailable = _inventory_unavailable()
+    if unavailable:
+        return unavailable
+    version = _parse_inventory_cursor(request.args.get("since", ""))
+    with INVENTORY_LOCK:
+        if version is not None and wait:
+            INVENTORY_LOCK.wait_for(lambda: INVENTORY["version"] != version, timeout=wait)
+        payload = _inventory_delta(version)
+    payload["clusters"] = _cluster_status()
+    return jsonify(payload)
+
+
+@app.route("/api/export")
+@require_auth
+def export_inventory():
+    fmt = (request.args.get("format") or "ndjson").strip().lower()
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"Unsupported format: {fmt}"}), 400
+    rows = _export_rows()
+    filename = f"vms-{time.strftime('%Y%m%d-%H%M%S')}.{fmt}"
+    response = Response(_export_stream(rows, fmt), mimetype=EXPORT_FORMATS[fmt])
+    response.headers["Content-Disposition"] = f"attachment; filename={filename}"
+    response.headers["X-Accel-Buffering"] = "no"
+    response.cache_control.no_store = True
+    return response
 
 
 @app.route("/api/vms/<int:vmid>")
 @require_auth
 def vm_details(vmid):
-    proxmox = _get_proxmox()
-    node = config.PVE_NODE
+    cluster = _request_cluster()
+    if cluster is None:
+        return jsonify({"error": "Unknown cluster"}), 404
+    proxmox = _get_proxmox(cluster)
+    node = _cluster(cluster)["node"]
     config_data = _unwrap_data(proxmox.nodes(node).qemu(vmid).config.get()) or {}
     status_data = _unwrap_data(proxmox.nodes(node).qemu(vmid).status.current.get()) or {}
     ip = _read_vm_ip(proxmox, node, vmid) if status_data.get("status") == "running" else None
@@ -761,9 +2740,10 @@ def vm_details(vmid):
             "value": value,
             "bridge": match.group(1) if match else None,
         }
-    return jsonify(
+    return _conditional_json(
         {
             "vmid": vmid,
+            "cluster": cluster,
             "name": config_data.get("name") or status_data.get("name"),
             "status": status_data.get("status"),
             "ip": ip,
@@ -773,6 +2753,31 @@ def vm_details(vmid):
             "ciuser": config_data.get("ciuser"),
             "networks": net_details,
             "uptime": status_data.get("uptime"),
+        },
+        volatile=("uptime",),
+    )
+
+
+@app.route("/api/vms/<int:vmid>/metrics")
+@require_auth
+def vm_metrics(vmid):
+    cluster = _request_cluster()
+    if cluster is None:
+        return jsonify({"error": "Unknown cluster"}), 404
+    timeframe = request.args.get("timeframe") or "hour"
+    if timeframe not in RRD_TIMEFRAMES:
+        return jsonify({"error": f"Unsupported timeframe: {timeframe}"}), 400
+    points = request.args.get("points", type=int) or config.METRICS_POINTS
+    points = max(2, min(points, config.METRICS_POINTS_MAX))
+    columns = _downsample(_rrd_columns(cluster, vmid, timeframe), points)
+    return _conditional_json(
+        {
+            "vmid": vmid,
+            "cluster": cluster,
+            "timeframe": timeframe,
+            "resolution": RRD_TIMEFRAMES[timeframe],
+            "points": len(columns["time"]),
+            "series": columns,
         }
     )
 
@@ -781,8 +2786,11 @@ def vm_details(vmid):
 @require_auth
 def update_vm(vmid):
     payload = request.get_json(silent=True) or {}
-    proxmox = _get_proxmox()
-    node = config.PVE_NODE
+    cluster = _request_cluster()
+    if cluster is None:
+        return jsonify({"error": "Unknown cluster"}), 404
+    proxmox = _get_proxmox(cluster)
+    node = _cluster(cluster)["node"]
 
     config_payload = {}
     if "cores" in payload and payload["cores"]:
@@ -813,11 +2821,12 @@ def update_vm(vmid):
     resize_note = None
     if disk_add_gb:
         delta_mb = int(float(disk_add_gb) * 1024)
-        resize_note = _resize_disk_by_mb(proxmox, node, vmid, config.PVE_DISK_NAME, delta_mb)
+        resize_note = _resize_disk_by_mb(proxmox, node, vmid, config.PVE_DISK_NAME, delta_mb, cluster)
 
     restart_requested = bool(payload.get("restart"))
     if restart_requested:
-        _queue_restart(vmid)
+        _queue_restart(vmid, cluster)
+    _nudge_inventory()
 
     return jsonify({"success": True, "resize": resize_note, "restart": restart_requested})
 
@@ -829,17 +2838,58 @@ def vm_power(vmid):
     action = payload.get("action")
     if action not in {"start", "stop", "reboot", "shutdown"}:
         return jsonify({"error": "Unsupported action"}), 400
-    proxmox = _get_proxmox()
-    node = config.PVE_NODE
+    cluster = _request_cluster()
+    if cluster is None:
+        return jsonify({"error": "Unknown cluster"}), 404
+    proxmox = _get_proxmox(cluster)
+    node = _cluster(cluster)["node"]
     getattr(proxmox.nodes(node).qemu(vmid).status, action).post()
+    _nudge_inventory()
     return jsonify({"success": True})
 
 
+@app.route("/api/vms/<int:vmid>/destroy", methods=["POST"])
+@require_auth
+def destroy_vm(vmid):
+    payload = request.get_json(silent=True) or {}
+    ports_enabled = bool(payload.get("ports_enabled", True))
+    cluster = _request_cluster()
+    if cluster is None:
+        return jsonify({"error": "Unknown cluster"}), 404
+    return _start_decommission([vmid], ports_enabled, cluster)
+
+
+@app.route("/api/vms/destroy", methods=["POST"])
+@require_auth
+def destroy_vms():
+    payload = request.get_json(silent=True) or {}
+    ports_enabled = bool(payload.get("ports_enabled", True))
+    vmids = []
+    for value in payload.get("vmids") or []:
+        try:
+            vmid = int(value)
+        except (TypeError, ValueError):
+            return jsonify({"error": f"Invalid VMID: {value}"}), 400
+        if vmid not in vmids:
+            vmids.append(vmid)
+    if not vmids:
+        return jsonify({"error": "No VMs selected"}), 400
+    if len(vmids) > DESTROY_MAX_BATCH:
+        return jsonify({"error": f"At most {DESTROY_MAX_BATCH} VMs per batch"}), 400
+    cluster = _request_cluster()
+    if cluster is None:
+        return jsonify({"error": "Unknown cluster"}), 404
+    return _start_decommission(vmids, ports_enabled, cluster)
+
+
 @app.route("/api/networks")
 @require_auth
 def list_networks():
-    proxmox = _get_proxmox()
-    node = config.PVE_NODE
+    cluster = _request_cluster()
+    if cluster is None:
+        return jsonify({"error": "Unknown cluster"}), 404
+    proxmox = _get_proxmox(cluster)
+    node = _cluster(cluster)["node"]
     raw = _unwrap_data(proxmox.nodes(node).network.get()) or []
     bridges = []
     for entry in raw:
@@ -850,7 +2900,7 @@ def list_networks():
                     "active": entry.get("active"),
                 }
             )
-    return jsonify({"bridges": bridges})
+    return _conditional_json({"bridges": bridges})
 
 
 @app.route("/api/ports", methods=["GET", "POST", "DELETE"])
@@ -860,6 +2910,8 @@ def vm_ports():
     response, data, status_code = _nft_request(request.method, "/api/vm-ports", payload)
     if response is None:
         return jsonify(data), status_code
+    if request.method == "GET" and status_code == 200:
+        return _conditional_json(data)
     return jsonify(data), status_code
 
 
@@ -881,10 +2933,14 @@ def create_vm():
     username = (payload.get("username") or "").strip() or config.DEFAULT_USERNAME
     password = (payload.get("password") or "").strip()
     ports_enabled = bool(payload.get("ports_enabled", True))
+    requested_cluster = (payload.get("cluster") or "").strip() or None
 
     if not NAME_PATTERN.match(name):
         return jsonify({"error": "Invalid VM name"}), 400
 
+    if requested_cluster and requested_cluster not in CLUSTERS:
+        return jsonify({"error": "Unknown cluster"}), 400
+
     preset = next((item for item in config.PRESETS if item["id"] == preset_id), None)
     if not preset:
         return jsonify({"error": "Preset not found"}), 400
@@ -895,21 +2951,73 @@ def create_vm():
     if not password:
         password = _generate_password()
 
-    job = _new_job()
+    # Retries carrying the same Idempotency-Key, or asking for a VM name
+    # that is already being (or was recently) provisioned, get the existing
+    # job back. A failed one is resumed from its last completed step.
+    fingerprint = [name, preset["id"], username, ports_enabled, requested_cluster]
+    keys = [("name", name)]
+    idempotency_key = (request.headers.get("Idempotency-Key") or "").strip()
+    if idempotency_key:
+        keys.insert(0, ("key", idempotency_key))
     _cleanup_jobs()
+    _forget_vanished_name(name)
+    job = _new_job(preset=preset["id"])
+    args = (name, username, password, preset, ports_enabled, requested_cluster)
+    key, entry = _claim_create(keys, fingerprint, job, args)
+    if entry is None and _names_in_use([f"{name}-vm"]):
+        # nft_port_panel allocations are keyed by VM name across all clusters.
+        _unclaim_create(job["id"])
+        return jsonify({"error": f"VM name {name} is already in use"}), 409
+    if entry is not None:
+        if entry["fingerprint"] != fingerprint:
+            if key[0] == "key":
+                return jsonify({"error": "Idempotency-Key was already used for a different request"}), 422
+            return jsonify({"error": f"VM {name} was already requested with different settings", "job_id": entry["job_id"]}), 409
+        args = _reopen_failed_job(entry["job_id"])
+        if args is None:
+            return jsonify({"job_id": entry["job_id"], "deduplicated": True})
+        _, reason = _reserve_capacity(entry["job_id"], args[3], args[5])
+        if reason:
+            _update_job(entry["job_id"], status="error", error=reason)
+            return jsonify({"error": reason, "job_id": entry["job_id"]}), 409
+        _start_provision(entry["job_id"], args)
+        return jsonify({"job_id": entry["job_id"], "resumed": True})
+
+    cluster, reason = _reserve_capacity(job["id"], preset, requested_cluster)
+    if reason:
+        _unclaim_create(job["id"])
+        return jsonify({"error": reason}), 409
+    args = args[:5] + (cluster,)
     with JOBS_LOCK:
-        JOBS[job["id"]] = job
-
-    thread = threading.Thread(
-        target=_provision_vm,
-        args=(job["id"], name, username, password, preset, ports_enabled),
-        daemon=True,
-    )
-    thread.start()
+        JOB_ARGS[job["id"]] = args
+    _start_provision(job["id"], args)
 
     return jsonify({"job_id": job["id"]})
 
 
+@app.route("/api/stats/provisioning")
+@require_auth
+def provisioning_stats():
+    kind = (request.args.get("kind") or "provision").strip()
+    window = request.args.get("window", type=int) or config.STATS_WINDOW_SECONDS
+    window = max(1, min(window, config.STATS_WINDOW_SECONDS))
+    cutoff = time.time() - window
+    with STATS_LOCK:
+        samples = [sample for sample in STATS_SAMPLES if sample["at"] >= cutoff and sample["kind"] == kind]
+    by_preset = {}
+    for sample in samples:
+        by_preset.setdefault(sample["preset"] or "-", []).append(sample)
+    summary = _aggregate_samples(samples)
+    summary.update(
+        {
+            "kind": kind,
+            "window_seconds": window,
+            "presets": {preset: _aggregate_samples(items) for preset, items in by_preset.items()},
+        }
+    )
+    return jsonify(summary)
+
+
 @app.route("/api/status/<job_id>")
 @require_auth
 def job_status(job_id):
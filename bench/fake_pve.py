@@ -0,0 +1,628 @@
+"""Minimal Proxmox VE API stand-in for offline benchmarks.
+
+Implements the subset of /api2/json (and the extjs resize) that app.py
+calls, plus the nft_port_panel endpoints, with configurable latency,
+task durations, failure rates and 501 fallbacks.
+
+    python bench/fake_pve.py --port 8006 --latency 0.02 --clone-seconds 3
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+NODE = "pve"
+TEMPLATE_VMID = 100
+BASE_DISK_MB = 8704
+
+
+def _default_options():
+    return {
+        "node": NODE,
+        "template_vmid": TEMPLATE_VMID,
+        "latency": 0.0,
+        "endpoint_latency": {},
+        "failure_rates": {},
+        "not_implemented": set(),
+        "clone_seconds": 2.0,
+        "resize_seconds": 0.5,
+        "power_seconds": 0.2,
+        "destroy_seconds": 0.5,
+        "boot_seconds": 3.0,
+        "node_memory_gb": 256,
+        "node_cpus": 64,
+        "storage_gb": 4096,
+        "vms": 0,
+        "seed": None,
+    }
+
+
+class FakeCluster:
+    def __init__(self, options):
+        self.options = options
+        self.lock = threading.Lock()
+        self.random = random.Random(options.get("seed"))
+        self.requests = {}
+        self.reset(options.get("vms", 0))
+
+    def reset(self, vm_count=0):
+        with self.lock:
+            self.vms = {}
+            self.tasks = {}
+            self.allocations = {}
+            self.next_port = 20000
+            self.requests = {}
+            template = self._make_vm(self.options["template_vmid"], "ubuntu-template")
+            template["template"] = 1
+            template["config"]["template"] = 1
+            for index in range(vm_count):
+                vmid = 1000 + index
+                vm = self._make_vm(vmid, f"bench-{index:04d}-vm")
+                if index % 3 != 2:
+                    vm["status"] = "running"
+                    vm["booted_at"] = 0.0
+
+    def _make_vm(self, vmid, name):
+        vm = {
+            "vmid": vmid,
+            "name": name,
+            "status": "stopped",
+            "booted_at": None,
+            "template": 0,
+            "config": {
+                "name": name,
+                "cores": 1,
+                "memory": 1024,
+                "ciuser": "ubuntu",
+                "scsi0": f"local-lvm:vm-{vmid}-disk-0,size={BASE_DISK_MB}M",
+                "net0": "virtio=BC:24:11:00:00:01,bridge=vmbr0",
+                "agent": "1",
+            },
+            "ip": f"10.10.{(vmid // 250) % 250}.{vmid % 250 + 2}",
+        }
+        self.vms[vmid] = vm
+        return vm
+
+    def _new_task(self, kind, vmid, duration, on_done=None, log=None):
+        upid = f"UPID:{self.options['node']}:{len(self.tasks):08X}:{int(time.time()):08X}:{kind}:{vmid}:root@pam:"
+        self.tasks[upid] = {
+            "kind": kind,
+            "started": time.monotonic(),
+            "duration": duration,
+            "on_done": on_done,
+            "done": False,
+            "exitstatus": "OK",
+            "log": log,
+        }
+        return upid
+
+    def _settle(self, task):
+        if task["done"] or time.monotonic() - task["started"] < task["duration"]:
+            return
+        task["done"] = True
+        if task["on_done"]:
+            task["on_done"]()
+
+    def settle_all(self):
+        for task in self.tasks.values():
+            self._settle(task)
+
+    def _task_log(self, task):
+        elapsed = time.monotonic() - task["started"]
+        fraction = 1.0 if task["duration"] <= 0 else min(1.0, elapsed / task["duration"])
+        lines = [f"starting {task['kind']}"]
+        if task["log"] == "progress":
+            total_gib = BASE_DISK_MB / 1024
+            for step in range(1, int(fraction * 20) + 1):
+                percent = step * 5
+                lines.append(
+                    f"transferred {total_gib * percent / 100:.1f} GiB of {total_gib:.1f} GiB ({percent:.2f}%)"
+                )
+        if task["done"]:
+            lines.append("TASK OK")
+        return lines
+
+    def _disk_mb(self, vm):
+        match = re.search(r"size=(\d+)M", vm["config"]["scsi0"])
+        return int(match.group(1)) if match else BASE_DISK_MB
+
+    def _resize(self, vm, size):
+        current = self._disk_mb(vm)
+        match = re.match(r"^(\+?)(\d+)([MG])$", size)
+        if not match:
+            raise ValueError(f"invalid size {size}")
+        value = int(match.group(2)) * (1024 if match.group(3) == "G" else 1)
+        target = current + value if match.group(1) else value
+        if target < current:
+            raise ValueError("shrinking disks is not supported")
+        vm["config"]["scsi0"] = re.sub(r"size=\d+M", f"size={target}M", vm["config"]["scsi0"])
+
+    # Handlers return (status, data) or (status, data, reason).
+
+    def nextid(self, params):
+        candidate = 100
+        while candidate in self.vms:
+            candidate += 1
+        return 200, str(candidate)
+
+    def qemu_list(self, params):
+        items = []
+        for vm in sorted(self.vms.values(), key=lambda item: item["vmid"]):
+            items.append(
+                {
+                    "vmid": vm["vmid"],
+                    "name": vm["name"],
+                    "status": vm["status"],
+                    "template": vm["template"],
+                    "maxmem": vm["config"]["memory"] * 1024 * 1024,
+                    "cpus": vm["config"]["cores"],
+                    "maxdisk": self._disk_mb(vm) * 1024 * 1024,
+                    "uptime": int(time.monotonic() - vm["booted_at"]) if vm["booted_at"] is not None else 0,
+                }
+            )
+        return 200, items
+
+    def clone(self, params, vmid):
+        source = self.vms.get(vmid)
+        newid = int(params.get("newid", 0))
+        if not source:
+            return 500, None, f"VM {vmid} does not exist"
+        if newid in self.vms:
+            return 500, None, f"VM {newid} already exists"
+        name = params.get("name") or f"vm-{newid}"
+        vm = self._make_vm(newid, name)
+        vm["locked"] = True
+
+        def unlock():
+            vm["locked"] = False
+
+        return 200, self._new_task("qmclone", vmid, self.options["clone_seconds"], unlock, "progress")
+
+    def config_get(self, params, vmid):
+        vm = self.vms.get(vmid)
+        if not vm:
+            return 500, None, f"Configuration file 'nodes/{self.options['node']}/qemu-server/{vmid}.conf' does not exist"
+        return 200, dict(vm["config"])
+
+    def config_set(self, params, vmid):
+        vm = self.vms.get(vmid)
+        if not vm:
+            return 500, None, f"VM {vmid} does not exist"
+        for key, value in params.items():
+            if key in {"digest", "delete"}:
+                continue
+            if key in {"cores", "memory"}:
+                value = int(value)
+            vm["config"][key] = value
+            if key == "name":
+                vm["name"] = value
+        return 200, None
+
+    def resize(self, params, vmid):
+        vm = self.vms.get(vmid)
+        if not vm:
+            return 500, None, f"VM {vmid} does not exist"
+        try:
+            self._resize(vm, params.get("size", ""))
+        except ValueError as exc:
+            return 400, None, str(exc)
+        return 200, self._new_task("resize", vmid, self.options["resize_seconds"], log="progress")
+
+    def cloudinit(self, params, vmid):
+        if vmid not in self.vms:
+            return 500, None, f"VM {vmid} does not exist"
+        return 200, None
+
+    def status_current(self, params, vmid):
+        vm = self.vms.get(vmid)
+        if not vm:
+            return 500, None, f"VM {vmid} does not exist"
+        uptime = int(time.monotonic() - vm["booted_at"]) if vm["booted_at"] is not None else 0
+        return 200, {
+            "vmid": vmid,
+            "name": vm["name"],
+            "status": vm["status"],
+            "uptime": uptime,
+            "qmpstatus": vm["status"],
+        }
+
+    def status_action(self, params, vmid, action):
+        vm = self.vms.get(vmid)
+        if not vm:
+            return 500, None, f"VM {vmid} does not exist"
+
+        def apply():
+            if action == "start":
+                vm["status"] = "running"
+                vm["booted_at"] = time.monotonic()
+            elif action in {"stop", "shutdown"}:
+                vm["status"] = "stopped"
+                vm["booted_at"] = None
+            elif action == "reboot":
+                vm["booted_at"] = time.monotonic()
+
+        return 200, self._new_task(f"qm{action}", vmid, self.options["power_seconds"], apply)
+
+    def agent(self, params, vmid, command):
+        vm = self.vms.get(vmid)
+        if not vm:
+            return 500, None, f"VM {vmid} does not exist"
+        if command != "network-get-interfaces":
+            return 501, None, f"Method '{command}' not implemented"
+        booted = vm["booted_at"]
+        if vm["status"] != "running" or booted is None:
+            return 500, None, f"VM {vmid} is not running"
+        if booted and time.monotonic() - booted < self.options["boot_seconds"]:
+            return 500, None, "QEMU guest agent is not running"
+        return 200, {
+            "result": [
+                {
+                    "name": "lo",
+                    "ip-addresses": [{"ip-address-type": "ipv4", "ip-address": "127.0.0.1", "prefix": 8}],
+                },
+                {
+                    "name": "eth0",
+                    "ip-addresses": [{"ip-address-type": "ipv4", "ip-address": vm["ip"], "prefix": 24}],
+                },
+            ]
+        }
+
+    def destroy(self, params, vmid):
+        vm = self.vms.get(vmid)
+        if not vm:
+            return 500, None, f"VM {vmid} does not exist"
+        if vm["status"] == "running":
+            return 500, None, f"VM {vmid} is running - destroy failed"
+
+        def remove():
+            self.vms.pop(vmid, None)
+
+        return 200, self._new_task("qmdestroy", vmid, self.options["destroy_seconds"], remove)
+
+    def task_status(self, params, upid):
+        task = self.tasks.get(upid)
+        if not task:
+            return 500, None, "no such task"
+        self._settle(task)
+        if not task["done"]:
+            return 200, {"upid": upid, "status": "running"}
+        return 200, {"upid": upid, "status": "stopped", "exitstatus": task["exitstatus"]}
+
+    def task_log(self, params, upid):
+        task = self.tasks.get(upid)
+        if not task:
+            return 500, None, "no such task"
+        self._settle(task)
+        lines = self._task_log(task)
+        start = int(params.get("start", 0))
+        limit = int(params.get("limit", 50))
+        window = lines[start:start + limit]
+        return 200, [{"n": start + index + 1, "t": text} for index, text in enumerate(window)], None, len(lines)
+
+    def rrddata(self, params, vmid):
+        vm = self.vms.get(vmid)
+        if not vm:
+            return 500, None, f"VM {vmid} not found"
+        step = {"hour": 60, "day": 1800, "week": 10800, "month": 43200, "year": 604800}.get(params.get("timeframe"), 60)
+        now = int(time.time()) // step * step
+        maxmem = vm["config"]["memory"] * 1024 * 1024
+        rows = []
+        for index in range(70):
+            phase = (now // step - 69 + index + vmid) / 7
+            load = 0.5 + 0.4 * math.sin(phase) if vm["status"] == "running" else 0.0
+            rows.append(
+                {
+                    "time": now - (69 - index) * step,
+                    "cpu": round(load * 0.8, 4),
+                    "maxcpu": vm["config"]["cores"],
+                    "mem": int(maxmem * (0.2 + 0.5 * load)),
+                    "maxmem": maxmem,
+                    "diskread": round(load * 2e6, 1),
+                    "diskwrite": round(load * 1e6, 1),
+                    "netin": round(load * 5e5, 1),
+                    "netout": round(load * 2e5, 1),
+                }
+            )
+        return 200, rows
+
+    def version(self, params):
+        return 200, {"version": "9.0.0", "release": "9.0", "repoid": "fake"}
+
+    def node_status(self, params):
+        running = [vm for vm in self.vms.values() if vm["status"] == "running"]
+        total = int(self.options["node_memory_gb"] * 1024**3)
+        used = min(total, sum(vm["config"]["memory"] for vm in running) * 1024**2)
+        return 200, {
+            "memory": {"total": total, "used": used, "free": total - used},
+            "cpuinfo": {"cpus": int(self.options["node_cpus"])},
+            "uptime": 86400,
+        }
+
+    def storage_status(self, params, storage):
+        total = int(self.options["storage_gb"] * 1024**3)
+        used = min(total, sum(self._disk_mb(vm) for vm in self.vms.values()) * 1024**2)
+        return 200, {"total": total, "used": used, "avail": total - used, "active": 1}
+
+    def network(self, params):
+        return 200, [
+            {"iface": "vmbr0", "type": "bridge", "active": 1},
+            {"iface": "vmbr1", "type": "bridge", "active": 1},
+            {"iface": "eno1", "type": "eth", "active": 1},
+        ]
+
+    def ticket(self, params):
+        return 200, {"ticket": "PVE:root@pam:FAKE", "CSRFPreventionToken": "FAKE", "username": "root@pam"}
+
+    def nft_ports_list(self, params):
+        return 200, {"ok": True, "allocations": list(self.allocations.values())}
+
+    def nft_ports_create(self, params):
+        name = params.get("vm_name")
+        if not name:
+            return 400, {"ok": False, "error": "vm_name is required"}
+        allocation = {
+            "name": name,
+            "ip": params.get("vm_ip"),
+            "ssh_port": self.next_port,
+            "range_start": self.next_port + 1,
+            "range_end": self.next_port + 100,
+        }
+        self.next_port += 101
+        self.allocations[name] = allocation
+        return 200, {"ok": True, **allocation}
+
+    def nft_ports_delete(self, params):
+        if self.allocations.pop(params.get("vm_name"), None) is None:
+            return 404, {"ok": False, "error": "Allocation not found"}
+        return 200, {"ok": True}
+
+    def nft_restart(self, params):
+        return 200, {"ok": True, "stdout": ""}
+
+
+ROUTES = [
+    ("GET", r"/cluster/nextid", "nextid"),
+    ("POST", r"/access/ticket", "ticket"),
+    ("GET", r"/nodes/[^/]+/qemu", "qemu_list"),
+    ("POST", r"/nodes/[^/]+/qemu/(\d+)/clone", "clone"),
+    ("GET", r"/nodes/[^/]+/qemu/(\d+)/config", "config_get"),
+    ("POST", r"/nodes/[^/]+/qemu/(\d+)/config", "config_set"),
+    ("PUT", r"/nodes/[^/]+/qemu/(\d+)/config", "config_set"),
+    ("PUT", r"/nodes/[^/]+/qemu/(\d+)/resize", "resize"),
+    ("POST", r"/nodes/[^/]+/qemu/(\d+)/resize", "resize"),
+    ("PUT", r"/nodes/[^/]+/qemu/(\d+)/cloudinit", "cloudinit"),
+    ("POST", r"/nodes/[^/]+/qemu/(\d+)/cloudinit", "cloudinit"),
+    ("GET", r"/nodes/[^/]+/qemu/(\d+)/status/current", "status_current"),
+    ("POST", r"/nodes/[^/]+/qemu/(\d+)/status/(start|stop|shutdown|reboot)", "status_action"),
+    ("GET", r"/nodes/[^/]+/qemu/(\d+)/agent/([\w-]+)", "agent"),
+    ("DELETE", r"/nodes/[^/]+/qemu/(\d+)", "destroy"),
+    ("GET", r"/nodes/[^/]+/tasks/([^/]+)/status", "task_status"),
+    ("GET", r"/nodes/[^/]+/tasks/([^/]+)/log", "task_log"),
+    ("GET", r"/nodes/[^/]+/qemu/(\d+)/rrddata", "rrddata"),
+    ("GET", r"/nodes/[^/]+/network", "network"),
+    ("GET", r"/version", "version"),
+    ("GET", r"/nodes/[^/]+/status", "node_status"),
+    ("GET", r"/nodes/[^/]+/storage/([^/]+)/status", "storage_status"),
+]
+
+NFT_ROUTES = [
+    ("GET", r"/api/vm-ports", "nft_ports_list"),
+    ("POST", r"/api/vm-ports", "nft_ports_create"),
+    ("DELETE", r"/api/vm-ports", "nft_ports_delete"),
+    ("POST", r"/api/restart", "nft_restart"),
+]
+
+COMPILED_ROUTES = [(method, re.compile(f"^{pattern}$"), name) for method, pattern, name in ROUTES]
+COMPILED_NFT_ROUTES = [(method, re.compile(f"^{pattern}$"), name) for method, pattern, name in NFT_ROUTES]
+
+# Names accepted by --latency-for, --fail and --not-implemented, e.g. "resize.put".
+ENDPOINT_NAMES = sorted({name for _, _, name in ROUTES + NFT_ROUTES} | {"extjs_resize"})
+
+
+def _endpoint_keys(name, method):
+    return [f"{name}.{method.lower()}", name]
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    wbufsize = 64 * 1024
+    cluster = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _params(self):
+        parsed = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            body = self.rfile.read(length).decode("utf-8")
+            if "json" in (self.headers.get("Content-Type") or ""):
+                try:
+                    params.update(json.loads(body) or {})
+                except ValueError:
+                    pass
+            else:
+                params.update({key: values[-1] for key, values in parse_qs(body).items()})
+        return parsed.path, params
+
+    def _send(self, status, payload, reason=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status, reason)
+        self.send_header("Content-Type", "application/json;charset=UTF-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _dispatch(self, method):
+        path, params = self._params()
+        cluster = self.cluster
+        if path.startswith("/_fake/"):
+            return self._control(method, path, params)
+
+        mode = "nft"
+        routes = COMPILED_NFT_ROUTES
+        match = re.match(r"^/api2/(json|extjs)(/.*)$", path)
+        if match:
+            mode, path = match.group(1), match.group(2)
+            routes = COMPILED_ROUTES
+        for route_method, pattern, name in routes:
+            found = pattern.match(path)
+            if route_method != method or not found:
+                continue
+            if mode == "extjs":
+                name = "extjs_resize" if name == "resize" else name
+            return self._handle(cluster, method, mode, name, found.groups(), params)
+        return self._send(501, {"data": None}, f"Method '{method} {path}' not implemented")
+
+    def _handle(self, cluster, method, mode, name, groups, params):
+        options = cluster.options
+        keys = _endpoint_keys(name, method)
+        delay = next((options["endpoint_latency"][key] for key in keys if key in options["endpoint_latency"]), None)
+        time.sleep(options["latency"] if delay is None else delay)
+
+        with cluster.lock:
+            cluster.requests[f"{name}.{method.lower()}"] = cluster.requests.get(f"{name}.{method.lower()}", 0) + 1
+            if any(key in options["not_implemented"] for key in keys):
+                return self._send(501, {"data": None}, "Not Implemented")
+            rate = next((options["failure_rates"][key] for key in keys if key in options["failure_rates"]), 0.0)
+            if rate and cluster.random.random() < rate:
+                return self._send(500, {"data": None}, "Injected failure")
+            cluster.settle_all()
+            handler_name = "resize" if name == "extjs_resize" else name
+            args = [int(value) if value.isdigit() else value for value in groups]
+            result = getattr(cluster, handler_name)(params, *args)
+
+        status, data = result[0], result[1]
+        reason = result[2] if len(result) > 2 else None
+        if mode == "nft":
+            return self._send(status, data, reason)
+        if mode == "extjs":
+            payload = {"success": 1 if status < 400 else 0, "data": data}
+            if status >= 400:
+                payload["message"] = reason
+            return self._send(200, payload)
+        payload = {"data": data}
+        if len(result) > 3:
+            payload["total"] = result[3]
+        return self._send(status, payload, reason)
+
+    def _control(self, method, path, params):
+        cluster = self.cluster
+        if path == "/_fake/reset" and method == "POST":
+            cluster.reset(int(params.get("vms", 0)))
+            return self._send(200, {"ok": True})
+        if path == "/_fake/stats" and method == "GET":
+            with cluster.lock:
+                return self._send(200, {"requests": dict(cluster.requests), "vms": len(cluster.vms)})
+        if path == "/_fake/options" and method == "POST":
+            with cluster.lock:
+                for key, value in params.items():
+                    if isinstance(cluster.options.get(key), (int, float)):
+                        cluster.options[key] = float(value)
+            return self._send(200, {"ok": True})
+        return self._send(404, {"ok": False, "error": "Unknown control endpoint"})
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+
+def start_server(host="127.0.0.1", port=0, **overrides):
+    options = _default_options()
+    options.update(overrides)
+    cluster = FakeCluster(options)
+    handler = type("BoundFakeHandler", (FakeHandler,), {"cluster": cluster})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="fake-pve", daemon=True)
+    thread.start()
+    return server, cluster
+
+
+def _parse_pairs(values, cast=float):
+    pairs = {}
+    for value in values or []:
+        key, _, raw = value.partition("=")
+        pairs[key.strip()] = cast(raw)
+    return pairs
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Fake Proxmox VE API for offline benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8006)
+    parser.add_argument("--latency", type=float, default=0.0, help="base latency per request (s)")
+    parser.add_argument(
+        "--latency-for",
+        action="append",
+        metavar="ENDPOINT=SECONDS",
+        help="per-endpoint latency, e.g. agent=0.5 or resize.put=0.1",
+    )
+    parser.add_argument("--fail", action="append", metavar="ENDPOINT=RATE", help="failure rate 0..1 per endpoint")
+    parser.add_argument(
+        "--not-implemented",
+        default="",
+        help="comma-separated endpoints answering 501, e.g. resize.put,resize.post,cloudinit.put",
+    )
+    parser.add_argument("--clone-seconds", type=float, default=2.0)
+    parser.add_argument("--resize-seconds", type=float, default=0.5)
+    parser.add_argument("--power-seconds", type=float, default=0.2)
+    parser.add_argument("--destroy-seconds", type=float, default=0.5)
+    parser.add_argument("--boot-seconds", type=float, default=3.0, help="delay before the guest agent reports an IP")
+    parser.add_argument("--node-memory-gb", type=float, default=256)
+    parser.add_argument("--node-cpus", type=int, default=64)
+    parser.add_argument("--storage-gb", type=float, default=4096)
+    parser.add_argument("--vms", type=int, default=0, help="number of pre-existing VMs")
+    parser.add_argument("--seed", type=int, default=None)
+    return parser
+
+
+def options_from_args(args):
+    return {
+        "latency": args.latency,
+        "endpoint_latency": _parse_pairs(args.latency_for),
+        "failure_rates": _parse_pairs(args.fail),
+        "not_implemented": {item.strip() for item in args.not_implemented.split(",") if item.strip()},
+        "clone_seconds": args.clone_seconds,
+        "resize_seconds": args.resize_seconds,
+        "power_seconds": args.power_seconds,
+        "destroy_seconds": args.destroy_seconds,
+        "boot_seconds": args.boot_seconds,
+        "node_memory_gb": args.node_memory_gb,
+        "node_cpus": args.node_cpus,
+        "storage_gb": args.storage_gb,
+        "vms": args.vms,
+        "seed": args.seed,
+    }
+
+
+def main():
+    args = build_parser().parse_args()
+    server, _ = start_server(args.host, args.port, **options_from_args(args))
+    print(f"Fake Proxmox API on http://{args.host}:{server.server_address[1]} (endpoints: {', '.join(ENDPOINT_NAMES)})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
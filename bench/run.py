@@ -0,0 +1,182 @@
+"""Offline benchmarks for the panel against bench/fake_pve.py.
+
+Measures provisioning throughput, time-to-IP and /api/vms latency as the
+fleet grows. Runs the Flask app in-process with its test client, so no
+real cluster or network access is needed.
+
+    python bench/run.py --jobs 8 --fleet 10,100,300 --latency 0.01
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fake_pve  # noqa: E402
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def _summary(values):
+    return {
+        "count": len(values),
+        "p50": _percentile(values, 50),
+        "p95": _percentile(values, 95),
+        "max": max(values) if values else None,
+    }
+
+
+def _configure_env(base_url, args):
+    os.environ.update(
+        {
+            "PVE_HOST": base_url,
+            "PVE_USER": "root@pam",
+            "PVE_TOKEN_NAME": "bench",
+            "PVE_TOKEN_VALUE": "bench",
+            "PVE_NODE": fake_pve.NODE,
+            "PVE_TEMPLATE_VMID": str(fake_pve.TEMPLATE_VMID),
+            "PVE_BASE_DISK_MB": str(fake_pve.BASE_DISK_MB),
+            "PVE_POLL_INTERVAL": str(args.poll_interval),
+            "PVE_IP_WAIT_SECONDS": str(args.ip_wait),
+            "NFT_PORT_PANEL_URL": base_url,
+            "NFT_PORT_PANEL_TOKEN": "bench",
+            "APP_PASSWORD": "",
+        }
+    )
+
+
+def bench_provisioning(client, fake, app_module, jobs, preset):
+    fake.reset(0)
+    started = time.monotonic()
+    job_ids = []
+    for index in range(jobs):
+        response = client.post(
+            "/api/create",
+            json={"vm_name": f"bench-{index:03d}", "preset": preset, "ports_enabled": True},
+        )
+        job_ids.append(response.get_json()["job_id"])
+
+    pending = set(job_ids)
+    while pending:
+        for job_id in list(pending):
+            job = app_module._job_snapshot(job_id)
+            if job and job["status"] in {"done", "error"}:
+                pending.discard(job_id)
+        time.sleep(0.05)
+    wall = time.monotonic() - started
+
+    totals, time_to_ip, errors = [], [], []
+    steps = {}
+    for job_id in job_ids:
+        job = app_module._job_snapshot(job_id)
+        if job["status"] == "error":
+            errors.append(job["error"])
+            continue
+        totals.append((job["finished"] - job["started"]) * 1000)
+        for step in job["steps"]:
+            if step["duration_ms"] is not None:
+                steps.setdefault(step["key"], []).append(step["duration_ms"])
+            if step["key"] == "ip" and step["finished"] is not None and step["status"] == "done":
+                time_to_ip.append((step["finished"] - job["started"]) * 1000)
+    return {
+        "jobs": jobs,
+        "preset": preset,
+        "wall_seconds": round(wall, 2),
+        "jobs_per_minute": round(jobs / wall * 60, 1) if wall else None,
+        "errors": errors,
+        "total_ms": _summary(totals),
+        "time_to_ip_ms": _summary(time_to_ip),
+        "steps_ms": {key: _summary(values) for key, values in steps.items()},
+    }
+
+
+def bench_list(client, fake, fleet_sizes, requests_per_size):
+    results = []
+    for size in fleet_sizes:
+        fake.reset(size)
+        durations = []
+        for _ in range(requests_per_size):
+            started = time.monotonic()
+            response = client.get("/api/vms")
+            durations.append((time.monotonic() - started) * 1000)
+            if response.status_code != 200:
+                raise RuntimeError(f"/api/vms returned {response.status_code}")
+        upstream = sum(fake.requests.values())
+        results.append(
+            {
+                "fleet": size,
+                "latency_ms": _summary(durations),
+                "upstream_calls_per_request": round(upstream / requests_per_size, 1),
+                "response_bytes": len(response.data),
+            }
+        )
+    return results
+
+
+def _fmt(value):
+    return "-" if value is None else f"{value:.0f}"
+
+
+def print_report(report):
+    provisioning = report["provisioning"]
+    print(f"Provisioning: {provisioning['jobs']} x {provisioning['preset']}")
+    print(f"  wall {provisioning['wall_seconds']}s, {provisioning['jobs_per_minute']} jobs/min, "
+          f"{len(provisioning['errors'])} errors")
+    for error in provisioning["errors"][:5]:
+        print(f"  error: {error}")
+    for label, key in (("total", "total_ms"), ("time-to-IP", "time_to_ip_ms")):
+        summary = provisioning[key]
+        print(f"  {label:<12} p50 {_fmt(summary['p50'])} ms  p95 {_fmt(summary['p95'])} ms  max {_fmt(summary['max'])} ms")
+    for key, summary in provisioning["steps_ms"].items():
+        print(f"  step {key:<7} p50 {_fmt(summary['p50'])} ms  p95 {_fmt(summary['p95'])} ms")
+    print("/api/vms latency by fleet size:")
+    for row in report["list"]:
+        latency = row["latency_ms"]
+        print(f"  {row['fleet']:>5} VMs  p50 {_fmt(latency['p50'])} ms  p95 {_fmt(latency['p95'])} ms  "
+              f"{row['upstream_calls_per_request']} upstream calls  {row['response_bytes']} bytes")
+
+
+def main():
+    parser = fake_pve.build_parser()
+    parser.description = "Offline panel benchmarks against the fake Proxmox API"
+    parser.set_defaults(port=0, latency=0.005, clone_seconds=1.0, boot_seconds=1.0)
+    parser.add_argument("--jobs", type=int, default=6, help="concurrent provisioning jobs")
+    parser.add_argument("--preset", default="starter")
+    parser.add_argument("--fleet", default="10,50,200", help="comma-separated fleet sizes for /api/vms")
+    parser.add_argument("--requests", type=int, default=10, help="/api/vms requests per fleet size")
+    parser.add_argument("--poll-interval", type=float, default=0.2)
+    parser.add_argument("--ip-wait", type=int, default=30)
+    parser.add_argument("--json", dest="json_path", help="also write the report to this file")
+    args = parser.parse_args()
+
+    server, fake = fake_pve.start_server(args.host, args.port, **fake_pve.options_from_args(args))
+    base_url = f"http://{args.host}:{server.server_address[1]}"
+    _configure_env(base_url, args)
+
+    import app as app_module
+
+    client = app_module.app.test_client()
+    report = {
+        "options": {key: value for key, value in vars(args).items() if key != "json_path"},
+        "provisioning": bench_provisioning(client, fake, app_module, args.jobs, args.preset),
+        "list": bench_list(client, fake, [int(item) for item in args.fleet.split(",") if item], args.requests),
+    }
+    server.shutdown()
+
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2, default=str)
+
+
+if __name__ == "__main__":
+    main()
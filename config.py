@@ -1,3 +1,4 @@
+import json
 import os
 
 from dotenv import load_dotenv
@@ -16,6 +17,13 @@ def _env_int(name, default):
         return default
 
 
+def _env_float(name, default):
+    try:
+        return float(os.getenv(name, str(default)).strip())
+    except (TypeError, ValueError):
+        return default
+
+
 PVE_HOST = os.getenv("PVE_HOST", "https://127.0.0.1:8006")
 PVE_USER = os.getenv("PVE_USER", "root@pam")
 PVE_PASSWORD = os.getenv("PVE_PASSWORD", "")
@@ -38,7 +46,51 @@ PVE_REGENERATE_CLOUDINIT = _env_bool("PVE_REGENERATE_CLOUDINIT", "true")
 START_AFTER_CREATE = _env_bool("PVE_START_AFTER_CREATE", "true")
 WAIT_FOR_IP = _env_bool("PVE_WAIT_FOR_IP", "true")
 IP_WAIT_SECONDS = _env_int("PVE_IP_WAIT_SECONDS", 180)
-POLL_INTERVAL = _env_int("PVE_POLL_INTERVAL", 5)
+POLL_INTERVAL = _env_float("PVE_POLL_INTERVAL", 5)
+
+PVE_CLUSTER_NAME = os.getenv("PVE_CLUSTER_NAME", "default").strip() or "default"
+PVE_CLUSTER_TIMEOUT = _env_float("PVE_CLUSTER_TIMEOUT", 30)
+PVE_CLUSTER_RETRY_SECONDS = _env_int("PVE_CLUSTER_RETRY_SECONDS", 30)
+PVE_POOL_SIZE = _env_int("PVE_POOL_SIZE", 10)
+
+
+def _load_clusters():
+    # PVE_CLUSTERS is a JSON list of clusters; keys left out fall back to the
+    # single-cluster PVE_* settings above.
+    defaults = {
+        "name": PVE_CLUSTER_NAME,
+        "host": PVE_HOST,
+        "user": PVE_USER,
+        "password": PVE_PASSWORD,
+        "token_name": PVE_TOKEN_NAME,
+        "token_value": PVE_TOKEN_VALUE,
+        "verify_ssl": PVE_VERIFY_SSL,
+        "node": PVE_NODE,
+        "template_vmid": TEMPLATE_VMID,
+        "storage": PVE_STORAGE,
+    }
+    raw = os.getenv("PVE_CLUSTERS", "").strip()
+    if not raw:
+        return [defaults]
+    try:
+        entries = json.loads(raw)
+    except ValueError as exc:
+        raise RuntimeError(f"PVE_CLUSTERS is not valid JSON: {exc}")
+    if not isinstance(entries, list) or not entries:
+        raise RuntimeError("PVE_CLUSTERS must be a non-empty JSON list")
+    clusters = []
+    for index, entry in enumerate(entries, start=1):
+        cluster = dict(defaults, name=f"cluster-{index}")
+        cluster.update(entry)
+        cluster["template_vmid"] = int(cluster["template_vmid"])
+        clusters.append(cluster)
+    names = [cluster["name"] for cluster in clusters]
+    if len(set(names)) != len(names):
+        raise RuntimeError("PVE_CLUSTERS names must be unique")
+    return clusters
+
+
+PVE_CLUSTERS = _load_clusters()
 
 APP_HOST = os.getenv("APP_HOST", "0.0.0.0")
 APP_PORT = _env_int("APP_PORT", 3333)
@@ -46,6 +98,34 @@ APP_DEBUG = _env_bool("APP_DEBUG", "false")
 APP_PASSWORD = os.getenv("APP_PASSWORD", "")
 APP_SECRET_KEY = os.getenv("APP_SECRET_KEY", "dev-secret")
 APP_PUBLIC_DOMAIN = os.getenv("APP_PUBLIC_DOMAIN", "").strip()
+STATS_WINDOW_SECONDS = _env_int("APP_STATS_WINDOW_SECONDS", 86400)
+STATS_MAX_SAMPLES = _env_int("APP_STATS_MAX_SAMPLES", 5000)
+INVENTORY_REFRESH_SECONDS = _env_float("APP_INVENTORY_REFRESH_SECONDS", 5)
+INVENTORY_IDLE_SECONDS = _env_int("APP_INVENTORY_IDLE_SECONDS", 60)
+INVENTORY_LONG_POLL_SECONDS = _env_int("APP_INVENTORY_LONG_POLL_SECONDS", 25)
+INVENTORY_CHANGE_LOG = _env_int("APP_INVENTORY_CHANGE_LOG", 2000)
+VM_PAGE_SIZE = _env_int("APP_VM_PAGE_SIZE", 50)
+VM_PAGE_SIZE_MAX = _env_int("APP_VM_PAGE_SIZE_MAX", 500)
+TASK_LOG_SECONDS = _env_float("APP_TASK_LOG_SECONDS", 2)
+IDEMPOTENCY_TTL_SECONDS = _env_int("APP_IDEMPOTENCY_TTL_SECONDS", 3600)
+CAPACITY_CHECK = _env_bool("APP_CAPACITY_CHECK", "true")
+CAPACITY_TTL_SECONDS = _env_float("APP_CAPACITY_TTL_SECONDS", 15)
+CAPACITY_MEMORY_OVERCOMMIT = _env_float("APP_CAPACITY_MEMORY_OVERCOMMIT", 1.0)
+CAPACITY_CPU_OVERCOMMIT = _env_float("APP_CAPACITY_CPU_OVERCOMMIT", 4.0)
+CAPACITY_MAX_RUNNING_VMS = _env_int("APP_CAPACITY_MAX_RUNNING_VMS", 0)
+METRICS_POINTS = _env_int("APP_METRICS_POINTS", 60)
+METRICS_POINTS_MAX = _env_int("APP_METRICS_POINTS_MAX", 500)
+EXPORT_WORKERS = max(1, _env_int("APP_EXPORT_WORKERS", 8))
+HEALTH_PROBE_SECONDS = max(1.0, _env_float("APP_HEALTH_PROBE_SECONDS", 15))
+READY_MAX_ACTIVE_JOBS = _env_int("APP_READY_MAX_ACTIVE_JOBS", 20)
+READY_MAX_JOB_LOCK_MS = _env_float("APP_READY_MAX_JOB_LOCK_MS", 250)
+COMPRESS_MIN_BYTES = _env_int("APP_COMPRESS_MIN_BYTES", 1024)
+APP_METRICS_TOKEN = os.getenv("APP_METRICS_TOKEN", "").strip()
+APP_PROFILE_REQUESTS = _env_bool("APP_PROFILE_REQUESTS", "false")
+APP_PROFILE_TRACE = _env_bool("APP_PROFILE_TRACE", "false")
+SLOW_REQUEST_MS = _env_int("APP_SLOW_REQUEST_MS", 2000)
+SLOW_REQUEST_LOG = os.getenv("APP_SLOW_REQUEST_LOG", "slow_requests.log").strip()
+SLOW_REQUEST_SAMPLE_RATE = _env_float("APP_SLOW_REQUEST_SAMPLE_RATE", 1.0)
 
 NFT_PORT_PANEL_URL = os.getenv("NFT_PORT_PANEL_URL", "http://localhost:8080").strip()
 NFT_PORT_PANEL_TOKEN = os.getenv("NFT_PORT_PANEL_TOKEN", "").strip()
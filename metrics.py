@@ -0,0 +1,144 @@
+import bisect
+import threading
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_LOCAL = threading.local()
+_LOCK = threading.Lock()
+_SHARDS = []
+_RETIRED = {"counters": {}, "histograms": {}}
+_PRUNE_AT = [64]
+_DESCRIPTIONS = {}
+_GAUGES = []
+
+
+def describe(name, kind, help_text):
+    _DESCRIPTIONS[name] = (kind, help_text)
+
+
+def gauge(name, help_text, fn):
+    describe(name, "gauge", help_text)
+    _GAUGES.append((name, fn))
+
+
+def _shard():
+    shard = getattr(_LOCAL, "shard", None)
+    if shard is None:
+        shard = {"counters": {}, "histograms": {}}
+        _LOCAL.shard = shard
+        with _LOCK:
+            # The dev server starts a thread per request, so dead threads'
+            # shards are folded away here as well as on scrape; otherwise
+            # they pile up while nobody scrapes /metrics.
+            if len(_SHARDS) >= _PRUNE_AT[0]:
+                _retire_dead_shards()
+                _PRUNE_AT[0] = max(64, 2 * len(_SHARDS))
+            _SHARDS.append((threading.current_thread(), shard))
+    return shard
+
+
+def _key(name, labels):
+    return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def inc(name, value=1, **labels):
+    counters = _shard()["counters"]
+    key = _key(name, labels)
+    counters[key] = counters.get(key, 0) + value
+
+
+def observe(name, seconds, **labels):
+    histograms = _shard()["histograms"]
+    key = _key(name, labels)
+    entry = histograms.get(key)
+    if entry is None:
+        entry = [[0] * (len(LATENCY_BUCKETS) + 1), 0.0, 0]
+        histograms[key] = entry
+    entry[0][bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+    entry[1] += seconds
+    entry[2] += 1
+
+
+def _merge(target, shard):
+    for key, value in list(shard["counters"].items()):
+        target["counters"][key] = target["counters"].get(key, 0) + value
+    for key, (buckets, total, count) in list(shard["histograms"].items()):
+        entry = target["histograms"].get(key)
+        if entry is None:
+            entry = [[0] * (len(LATENCY_BUCKETS) + 1), 0.0, 0]
+            target["histograms"][key] = entry
+        for index, value in enumerate(list(buckets)):
+            entry[0][index] += value
+        entry[1] += total
+        entry[2] += count
+
+
+def _retire_dead_shards():
+    # Caller holds _LOCK.
+    alive = []
+    for thread, shard in _SHARDS:
+        if thread.is_alive():
+            alive.append((thread, shard))
+        else:
+            _merge(_RETIRED, shard)
+    _SHARDS[:] = alive
+
+
+def _collect():
+    with _LOCK:
+        _retire_dead_shards()
+        merged = {"counters": {}, "histograms": {}}
+        _merge(merged, _RETIRED)
+        for _, shard in _SHARDS:
+            _merge(merged, shard)
+    return merged
+
+
+def _format_labels(labels, extra=None):
+    pairs = list(labels) + list(extra or [])
+    if not pairs:
+        return ""
+    body = ",".join(
+        '{}="{}"'.format(key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in pairs
+    )
+    return "{" + body + "}"
+
+
+def _format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def render():
+    merged = _collect()
+    families = {}
+    for (name, labels), value in sorted(merged["counters"].items()):
+        families.setdefault(name, []).append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    for (name, labels), (buckets, total, count) in sorted(merged["histograms"].items()):
+        lines = families.setdefault(name, [])
+        cumulative = 0
+        for bound, value in zip(LATENCY_BUCKETS, buckets):
+            cumulative += value
+            lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+        lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {count}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+        lines.append(f"{name}_count{_format_labels(labels)} {count}")
+    for name, fn in _GAUGES:
+        values = fn()
+        if not isinstance(values, dict):
+            values = {(): values}
+        lines = families.setdefault(name, [])
+        for labels, value in values.items():
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+    output = []
+    for name in sorted(families):
+        kind, help_text = _DESCRIPTIONS.get(name, ("untyped", ""))
+        if help_text:
+            output.append(f"# HELP {name} {help_text}")
+        output.append(f"# TYPE {name} {kind}")
+        output.extend(families[name])
+    return "\n".join(output) + "\n"
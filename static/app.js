@@ -214,6 +214,7 @@ form.addEventListener("submit", (event) => {
         preset: formData.get("preset"),
         ports_enabled: !!portsEnabled?.checked,
     };
+    if (formData.get("cluster")) payload.cluster = formData.get("cluster");
 
     setError("");
     resetResults();
@@ -286,6 +287,7 @@ const tabManage = document.getElementById("tab-manage");
 const tabPorts = document.getElementById("tab-ports");
 const refreshVmsBtn = document.getElementById("refresh-vms");
 const vmListEl = document.getElementById("vm-list");
+const vmClusterErrors = document.getElementById("vm-cluster-errors");
 const vmDetailsEl = document.getElementById("vm-details");
 const vmEmptyEl = document.getElementById("vm-empty");
 const vmTitle = document.getElementById("vm-title");
@@ -308,6 +310,9 @@ const vmGenPass = document.getElementById("vm-gen-pass");
 const vmStartBtn = document.getElementById("vm-start");
 const vmRebootBtn = document.getElementById("vm-reboot");
 const vmStopBtn = document.getElementById("vm-stop");
+const vmDestroyBtn = document.getElementById("vm-destroy");
+const vmPerfGrid = document.getElementById("vm-perf-grid");
+const vmPerfTimeframe = document.getElementById("vm-perf-timeframe");
 const portsForm = document.getElementById("ports-form");
 const portsName = document.getElementById("ports-name");
 const portsIp = document.getElementById("ports-ip");
@@ -317,10 +322,14 @@ const portsCount = document.getElementById("ports-count");
 const portsRestart = document.getElementById("ports-restart");
 
 let selectedVmid = null;
+let selectedCluster = null;
 let networkOptions = [];
 let netMap = {};
 let managePollTimer = null;
+let managePolling = false;
 const MANAGE_POLL_INTERVAL = 5000;
+const MANAGE_LONG_POLL_SECONDS = 25;
+let vmCursor = "";
 let portsPollTimer = null;
 const PORTS_POLL_INTERVAL = 6000;
 
@@ -365,8 +374,20 @@ function statusClass(status) {
     return "status--unknown";
 }
 
+function vmApiUrl(vmid, path = "", query = {}) {
+    const params = new URLSearchParams(query);
+    if (selectedCluster) params.set("cluster", selectedCluster);
+    const search = params.toString();
+    return `/api/vms/${vmid}${path}${search ? `?${search}` : ""}`;
+}
+
+function isSelectedVm(vmid, cluster) {
+    return vmid === selectedVmid && (cluster || null) === selectedCluster;
+}
+
 function loadNetworks() {
-    return fetch("/api/networks")
+    const params = new URLSearchParams(selectedCluster ? { cluster: selectedCluster } : {});
+    return fetch(`/api/networks?${params}`)
         .then((response) => response.json())
         .then((data) => {
             networkOptions = (data.bridges || []).filter((entry) => entry.iface);
@@ -397,6 +418,38 @@ function renderNetworkSelects(currentIface, currentBridge) {
     });
 }
 
+function renderVmCard(card, vm) {
+    card.className = `vm-card ${statusClass(vm.status)}`;
+    card.classList.toggle("active", isSelectedVm(vm.vmid, vm.cluster));
+    card.dataset.vmid = vm.vmid;
+    card.dataset.cluster = vm.cluster || "";
+    const clusterBadge =
+        vmListEl.dataset.multiCluster !== undefined && vm.cluster
+            ? `<span class="vm-card-cluster">${vm.cluster}</span>`
+            : "";
+    card.innerHTML = `
+        <div class="vm-card-top">
+            <span class="status-dot"></span>
+            ${clusterBadge}
+            <div class="vm-card-id">#${vm.vmid}</div>
+        </div>
+        <div class="vm-card-name">${vm.name || "Unnamed VM"}</div>
+        <div class="vm-card-ip">${vm.ip || ""}</div>
+        <div class="vm-card-specs">
+            <span>${vm.maxcpu || "-"} vCPU</span>
+            <span>${vm.maxmem_mb ? Math.round(vm.maxmem_mb / 1024) : "-"} GB RAM</span>
+        </div>
+    `;
+}
+
+function createVmCard(vm) {
+    const card = document.createElement("button");
+    card.type = "button";
+    renderVmCard(card, vm);
+    card.addEventListener("click", () => selectVm(vm.vmid, vm.cluster));
+    return card;
+}
+
 function renderVmList(vms) {
     if (!vmListEl) return;
     vmListEl.innerHTML = "";
@@ -405,36 +458,71 @@ function renderVmList(vms) {
         return;
     }
     vms.forEach((vm) => {
-        const card = document.createElement("button");
-        card.type = "button";
-        card.className = `vm-card ${statusClass(vm.status)}`;
-        if (vm.vmid === selectedVmid) card.classList.add("active");
-        card.innerHTML = `
-            <div class="vm-card-top">
-                <span class="status-dot"></span>
-                <div class="vm-card-id">#${vm.vmid}</div>
-            </div>
-            <div class="vm-card-name">${vm.name || "Unnamed VM"}</div>
-            <div class="vm-card-ip">${vm.ip || ""}</div>
-            <div class="vm-card-specs">
-                <span>${vm.maxcpu || "-"} vCPU</span>
-                <span>${vm.maxmem_mb ? Math.round(vm.maxmem_mb / 1024) : "-"} GB RAM</span>
-            </div>
-        `;
-        card.addEventListener("click", () => selectVm(vm.vmid));
-        vmListEl.appendChild(card);
+        vmListEl.appendChild(createVmCard(vm));
     });
 }
 
+function findVmCard(vm) {
+    return Array.from(vmListEl.querySelectorAll(".vm-card")).find(
+        (card) => parseInt(card.dataset.vmid, 10) === vm.vmid && card.dataset.cluster === (vm.cluster || "")
+    );
+}
+
+function applyVmChanges(changes) {
+    if (!vmListEl) return;
+    if (changes.reset) {
+        renderVmList(changes.upserted || []);
+    } else {
+        (changes.removed || []).forEach((vm) => {
+            findVmCard(vm)?.remove();
+        });
+        (changes.upserted || []).forEach((vm) => {
+            const existing = findVmCard(vm);
+            if (existing) {
+                renderVmCard(existing, vm);
+                return;
+            }
+            vmListEl.querySelector(".vm-empty")?.remove();
+            const next = Array.from(vmListEl.querySelectorAll(".vm-card")).find((card) => {
+                const vmid = parseInt(card.dataset.vmid, 10);
+                return vmid > vm.vmid || (vmid === vm.vmid && card.dataset.cluster > (vm.cluster || ""));
+            });
+            vmListEl.insertBefore(createVmCard(vm), next || null);
+        });
+        if (!vmListEl.children.length) {
+            vmListEl.innerHTML = "<div class=\"vm-empty\">No VMs found.</div>";
+        }
+    }
+    if (!selectedVmid) return;
+    if ((changes.removed || []).some((vm) => isSelectedVm(vm.vmid, vm.cluster))) {
+        clearVmSelection();
+    } else if ((changes.upserted || []).some((vm) => isSelectedVm(vm.vmid, vm.cluster))) {
+        loadVmDetails(selectedVmid, { updateFields: false });
+    }
+}
+
+function renderClusterStatus(clusters) {
+    if (!vmClusterErrors || !clusters) return;
+    const down = Object.entries(clusters).filter(([, state]) => state.ok === false);
+    vmClusterErrors.textContent = down
+        .map(([name, state]) => `Cluster ${name} unreachable: ${state.error || "no answer"}`)
+        .join(" · ");
+    vmClusterErrors.classList.toggle("is-visible", down.length > 0);
+}
+
 function loadVmList() {
     if (!vmListEl) return;
     fetch("/api/vms")
-        .then((response) => response.json())
-        .then((data) => {
+        .then((response) => response.json().then((data) => ({ ok: response.ok, data })))
+        .then(({ ok, data }) => {
+            renderClusterStatus(data.clusters);
+            if (!ok || data.error) {
+                throw new Error(data.error || "Request failed");
+            }
             renderVmList(data.vms || []);
         })
         .catch((err) => {
-            if (!vmListEl.children.length) {
+            if (!vmListEl.querySelector(".vm-card")) {
                 vmListEl.innerHTML = `<div class="vm-empty">Failed to load: ${err.message}</div>`;
             }
         });
@@ -453,9 +541,11 @@ function updateMeta(details) {
     vmMeta.appendChild(document.createTextNode(` · ${ipText}`));
 }
 
-function selectVm(vmid) {
+function selectVm(vmid, cluster) {
     selectedVmid = vmid;
+    selectedCluster = cluster || null;
     loadVmDetails(vmid);
+    loadVmMetrics(vmid);
 }
 
 function updateVmPorts(details) {
@@ -487,7 +577,7 @@ function loadVmDetails(vmid, options = {}) {
     setVmMessage("", false);
     vmEmptyEl.hidden = true;
     vmDetailsEl.hidden = false;
-    fetch(`/api/vms/${vmid}`)
+    fetch(vmApiUrl(vmid))
         .then((response) => response.json())
         .then((details) => {
             updateMeta(details);
@@ -519,13 +609,87 @@ function loadVmDetails(vmid, options = {}) {
         });
 }
 
+const PERF_CHARTS = [
+    { label: "CPU", unit: "%", value: (s, i) => (s.cpu[i] == null ? null : s.cpu[i] * 100) },
+    {
+        label: "Memory",
+        unit: "%",
+        value: (s, i) => (s.mem[i] == null || !s.maxmem[i] ? null : (s.mem[i] / s.maxmem[i]) * 100),
+    },
+    { label: "Disk I/O", unit: "B/s", value: (s, i) => sumNullable(s.diskread[i], s.diskwrite[i]) },
+    { label: "Network", unit: "B/s", value: (s, i) => sumNullable(s.netin[i], s.netout[i]) },
+];
+
+function sumNullable(a, b) {
+    if (a == null && b == null) return null;
+    return (a || 0) + (b || 0);
+}
+
+function formatPerfValue(value, unit) {
+    if (value == null) return "-";
+    if (unit === "%") return `${value.toFixed(1)}%`;
+    const units = ["B/s", "KB/s", "MB/s", "GB/s"];
+    let index = 0;
+    while (value >= 1024 && index < units.length - 1) {
+        value /= 1024;
+        index += 1;
+    }
+    return `${value.toFixed(value >= 10 ? 0 : 1)} ${units[index]}`;
+}
+
+function sparkline(values) {
+    const present = values.filter((value) => value != null);
+    if (present.length < 2) return "";
+    const max = Math.max(...present) || 1;
+    const step = 100 / (values.length - 1);
+    const points = values
+        .map((value, index) => (value == null ? null : `${(index * step).toFixed(1)},${(30 - (value / max) * 28).toFixed(1)}`))
+        .filter(Boolean)
+        .join(" ");
+    return `<svg viewBox="0 0 100 30" preserveAspectRatio="none"><polyline points="${points}"/></svg>`;
+}
+
+function loadVmMetrics(vmid) {
+    if (!vmPerfGrid) return;
+    const timeframe = vmPerfTimeframe ? vmPerfTimeframe.value : "hour";
+    const cluster = selectedCluster;
+    fetch(vmApiUrl(vmid, "/metrics", { timeframe, points: 60 }))
+        .then((response) => response.json())
+        .then((data) => {
+            if (!isSelectedVm(vmid, cluster)) return;
+            const series = data.series;
+            if (!series || !series.time.length) {
+                vmPerfGrid.innerHTML = "<div class=\"hint\">No history yet.</div>";
+                return;
+            }
+            vmPerfGrid.innerHTML = PERF_CHARTS.map((chart) => {
+                const values = series.time.map((_, index) => chart.value(series, index));
+                const latest = [...values].reverse().find((value) => value != null);
+                return `
+                    <div class="vm-perf-chart">
+                        <div class="vm-perf-label"><span>${chart.label}</span><span>${formatPerfValue(latest, chart.unit)}</span></div>
+                        ${sparkline(values)}
+                    </div>
+                `;
+            }).join("");
+        })
+        .catch(() => {
+            vmPerfGrid.innerHTML = "<div class=\"hint\">History unavailable.</div>";
+        });
+}
+
+if (vmPerfTimeframe) {
+    vmPerfTimeframe.addEventListener("change", () => {
+        if (selectedVmid) loadVmMetrics(selectedVmid);
+    });
+}
+
 function renderVmListFromSelection() {
     if (!vmListEl) return;
     Array.from(vmListEl.children).forEach((child) => {
-        if (!(child instanceof HTMLElement)) return;
-        const idText = child.querySelector(".vm-card-id")?.textContent || "";
-        const vmid = parseInt(idText.replace("#", ""), 10);
-        child.classList.toggle("active", vmid === selectedVmid);
+        if (!(child instanceof HTMLElement) || !child.dataset.vmid) return;
+        const vmid = parseInt(child.dataset.vmid, 10);
+        child.classList.toggle("active", isSelectedVm(vmid, child.dataset.cluster));
     });
 }
 
@@ -570,7 +734,7 @@ function submitVmUpdate(event, options = {}) {
     }
     if (restartRequested) payload.restart = true;
     setVmMessage("", false);
-    fetch(`/api/vms/${selectedVmid}/update`, {
+    fetch(vmApiUrl(selectedVmid, "/update"), {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify(payload),
@@ -599,7 +763,7 @@ if (vmSaveRestart) {
 
 function powerAction(action) {
     if (!selectedVmid) return;
-    fetch(`/api/vms/${selectedVmid}/power`, {
+    fetch(vmApiUrl(selectedVmid, "/power"), {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({ action }),
@@ -613,19 +777,97 @@ if (vmStartBtn) vmStartBtn.addEventListener("click", () => powerAction("start"))
 if (vmRebootBtn) vmRebootBtn.addEventListener("click", () => powerAction("reboot"));
 if (vmStopBtn) vmStopBtn.addEventListener("click", () => powerAction("stop"));
 
+function clearVmSelection() {
+    selectedVmid = null;
+    selectedCluster = null;
+    if (vmDetailsEl) vmDetailsEl.hidden = true;
+    if (vmEmptyEl) vmEmptyEl.hidden = false;
+}
+
+function pollDestroyJob(jobId) {
+    fetch(`/api/status/${jobId}`)
+        .then((response) => response.json())
+        .then((data) => {
+            if (data.error && !data.status) {
+                throw new Error(data.error);
+            }
+            if (data.status === "done" || data.status === "error") {
+                if (vmDestroyBtn) vmDestroyBtn.disabled = false;
+                const warnings = (data.steps || []).filter((step) => step.status === "warn" || step.status === "error");
+                if (data.status === "error") {
+                    setVmMessage(data.error || "Destroy failed", true);
+                } else {
+                    const note = warnings.length ? `VM destroyed. ${warnings[0].message}` : "VM destroyed.";
+                    clearVmSelection();
+                    setVmMessage(note, warnings.length > 0);
+                }
+                loadVmList();
+                loadPorts();
+                return;
+            }
+            setTimeout(() => pollDestroyJob(jobId), 2000);
+        })
+        .catch((err) => {
+            if (vmDestroyBtn) vmDestroyBtn.disabled = false;
+            setVmMessage(err.message, true);
+        });
+}
+
+function destroyVm() {
+    if (!selectedVmid) return;
+    if (!window.confirm(`Destroy VM ${selectedVmid}? Disks and port allocations will be removed.`)) return;
+    setVmMessage("", false);
+    if (vmDestroyBtn) vmDestroyBtn.disabled = true;
+    fetch(vmApiUrl(selectedVmid, "/destroy"), {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({}),
+    })
+        .then((response) => response.json().then((data) => ({ ok: response.ok, data })))
+        .then(({ ok, data }) => {
+            if (!ok || data.error) {
+                throw new Error(data.error || "Destroy failed");
+            }
+            setVmMessage("Destroying VM...", false);
+            pollDestroyJob(data.job_id);
+        })
+        .catch((err) => {
+            if (vmDestroyBtn) vmDestroyBtn.disabled = false;
+            setVmMessage(err.message, true);
+        });
+}
+
+if (vmDestroyBtn) vmDestroyBtn.addEventListener("click", destroyVm);
+
+function pollVmChanges() {
+    if (!managePolling) return;
+    const params = new URLSearchParams({ since: vmCursor, wait: MANAGE_LONG_POLL_SECONDS });
+    fetch(`/api/vms/changes?${params}`)
+        .then((response) => response.json().then((data) => ({ ok: response.ok, data })))
+        .then(({ ok, data }) => {
+            renderClusterStatus(data.clusters);
+            if (!ok || data.error) {
+                throw new Error(data.error || "Failed to load changes");
+            }
+            vmCursor = data.cursor;
+            applyVmChanges(data);
+            if (managePolling) managePollTimer = setTimeout(pollVmChanges, 250);
+        })
+        .catch(() => {
+            if (managePolling) managePollTimer = setTimeout(pollVmChanges, MANAGE_POLL_INTERVAL);
+        });
+}
+
 function startManagePolling() {
-    if (managePollTimer) return;
-    managePollTimer = setInterval(() => {
-        loadVmList();
-        if (selectedVmid) {
-            loadVmDetails(selectedVmid, { updateFields: false });
-        }
-    }, MANAGE_POLL_INTERVAL);
+    if (managePolling) return;
+    managePolling = true;
+    pollVmChanges();
 }
 
 function stopManagePolling() {
+    managePolling = false;
     if (!managePollTimer) return;
-    clearInterval(managePollTimer);
+    clearTimeout(managePollTimer);
     managePollTimer = null;
 }
 